@@ -1,14 +1,109 @@
+import collections
 import math
+import os
+import random
 import numpy as np
-import copy
 import time
+from concurrent.futures import ProcessPoolExecutor
+import bitboard
+import batch_engine
+import endgame
+import heuristics
+import ntuple
+import symmetry
+from game_logic import Board, BitBoard, BitboardGame
+from rollout_cache import RolloutCache
 from all_AI_iterations import save_game_result_to_csv
 
+_worker_rng = None  # each pool worker's numpy rng, set by _init_rollout_worker
+
+
+def _init_rollout_worker(base_seed: int):
+    """
+    seeds a pool worker. forked workers start with a copy of the parent's rng state, so without this they would all
+    play exactly the same rollouts
+    """
+    global _worker_rng
+    seed_sequence = np.random.SeedSequence([base_seed, os.getpid()])
+    _worker_rng = np.random.default_rng(seed_sequence)
+    random.seed(int(seed_sequence.generate_state(1, np.uint64)[0]))
+    np.random.seed(seed_sequence.generate_state(1)[0])
+
+
+def _stream_seed(move_seed: int, stream: int, index: int) -> int:
+    """seed of the index-th rollout of a stream (splitmix64 of the three), for common random numbers"""
+    return bitboard.splitmix64((move_seed + stream * 0xD1B54A32D192ED03 + (index + 1) * bitboard.GOLDEN_GAMMA)
+                               & bitboard.MASK64)
+
+
+def _seeded_rollouts(board: int, score: int, seeds: list, horizon: int = None, bootstrap=None,
+                     deadline: float = None) -> list:
+    """
+    final scores of one bitboard.seeded_random_game per seed from a packed board, so games from different boards with
+    the same seed are played with the same luck. No more games are started once time.perf_counter() passes deadline
+    """
+    scores = []
+    for seed in seeds:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        points, final_board = bitboard.seeded_random_game(board, seed, horizon)
+        if horizon is not None and bitboard.legal_moves(final_board):  # stopped at the horizon
+            points += float(bootstrap(np.array([final_board], dtype=np.uint64))[0])
+        scores.append(score + points)
+    return scores
+
+
+def _rollout_task(board: int, score: int, num_rollouts: int, legal: bool, horizon: int = None,
+                  bootstrap=None, seeds: list = None) -> list:
+    """
+    runs in a pool worker: final scores of num_rollouts random games from a packed board.
+    uses BitboardGame whatever game_obj is, which has the same rules and is the cheapest to send between processes
+    """
+    if seeds is not None:
+        return _seeded_rollouts(board, score, seeds, horizon, bootstrap)
+    scores = []
+    for _ in range(num_rollouts):
+        game = BitboardGame(board=BitBoard(packed=board), use_gui=False)
+        game.score = score
+        if legal:
+            MDP2.one_game_legal(game, random.Random(random.getrandbits(64)), horizon)
+        else:
+            MDP2.one_game(game, horizon)
+        scores.append(MDP2.rollout_result(game, bootstrap))
+    return scores
+
+
+def _play_batch(games: batch_engine.BatchGames, legal: bool, horizon: int = None, bootstrap=None) -> np.ndarray:
+    """
+    plays a batch of rollouts (up to horizon moves each) and returns their final scores, plus bootstrap's estimate for
+    the games that were stopped before they were over
+    """
+    scores = games.play_random(legal_only=legal, max_moves=horizon)
+    if horizon is None:
+        return scores
+    scores = scores.astype(np.float64)
+    stopped = ~games.done
+    if stopped.any():
+        scores[stopped] += bootstrap(games.boards[stopped])
+    return scores
+
+
+def _batch_rollout_task(boards: np.ndarray, scores: np.ndarray, legal: bool, horizon: int = None,
+                        bootstrap=None, seeds: np.ndarray = None) -> np.ndarray:
+    """runs in a pool worker: plays one slice of a batch_engine batch with _play_batch"""
+    return _play_batch(batch_engine.BatchGames(boards, scores, _worker_rng, seeds), legal, horizon, bootstrap)
+
+
 class MDP2:
     """
     The Monte Carlo-Powered Markov Decision Process AI described in the paper
     """
-    def __init__(self, game, game_obj, core_params: np.ndarray = None, best_proportion = 1, verbose = False):
+    def __init__(self, game, game_obj, core_params: np.ndarray = None, best_proportion = 1, verbose = False,
+                 batch_rollouts: bool = False, legal_rollouts: bool = True, workers: int = None,
+                 rollout_cache: int = None, rollout_horizon: int = None, bootstrap=None, racing_rounds: int = None,
+                 racing_confidence: float = 2.0, time_budget_ms: float = None, chance_samples: int = None,
+                 common_random_numbers: bool = False, endgame_nodes: int = 0, endgame_empty: int = 2,
+                 endgame_merges: int = 0):
         """
         Args:
             game: Game object the AI should play
@@ -16,6 +111,41 @@ def __init__(self, game, game_obj, core_params: np.ndarray = None, best_proporti
             core_params (np.ndarray): parameters for depth 2 dict generation according to below specification
             best_proportion (float):
             verbose (bool): whether to print intermediate technical results to terminal
+            batch_rollouts (bool): play every rollout of a move in one batch_engine batch instead of one game_obj
+                at a time
+            legal_rollouts (bool): rollouts only pick from the legal directions (see one_game_legal)
+            workers (int): if set, rollouts are spread over this many processes. The pool is made on the first move
+                and kept until run() finishes (or close() is called)
+            rollout_cache (int): if set, keep rollout statistics for up to this many boards between moves, so chance
+                boards that rollouts already passed through only need the rollouts they're missing (see rollout_cache)
+            rollout_horizon (int): if set, rollouts stop after this many moves instead of at game over, and bootstrap's
+                estimate of the points still to come is added to their score. Keeps the cost of a move the same
+                however early in the game it is
+            bootstrap: function from an (N,) np.uint64 array of packed boards to the points expected from each of them
+                under random play. Only used with rollout_horizon, heuristics.rollout_points_batch if not set.
+                Has to be a module level function to work with workers
+            racing_rounds (int): if set, a move's rollouts are played in this many rounds, and directions that are
+                clearly worse than the best one are dropped between rounds (see racing_direction_values). Racing plays
+                its own rollouts, it doesn't use the rollout cache
+            racing_confidence (float): how many standard errors wide the confidence bounds for racing are
+            time_budget_ms (float): if set, every move keeps playing racing rounds until this many milliseconds are
+                up, then makes the best move so far (see racing_direction_values). A move only goes over by the
+                rollouts that were being played when the time ran out, so rollout_horizon (shorter rollouts) keeps it
+                tighter. Statistics for the last move are in last_decision
+            chance_samples (int): if set, instead of every possible spawn with depth_dict rollouts each, every
+                direction gets this many spawns drawn with the game's odds and one rollout per draw
+                (see sampled_chance_nodes), so the rollouts don't grow with the number of empty tiles
+            common_random_numbers (bool): seed every rollout from its chance board's position in its direction and its
+                own index (see stream_seeds), so the directions are compared with the same luck instead of
+                independent rollouts. Seeded rollouts always pick legal directions, and rollouts played through the
+                rollout cache aren't seeded
+            endgame_nodes (int): when the board has endgame_empty or fewer empty tiles, first try to search the rest
+                of the game exactly with an endgame.EndgameSolver of this many nodes, and play its best move if the
+                whole tree fits. 0 or None turns it off, which is the default: even a game's last boards nearly always
+                still have a long (if unlikely) way to keep going, so the search runs out of moves and gives up
+            endgame_empty (int): most empty tiles a board can have for the endgame solver to be tried
+            endgame_merges (int): most pairs of neighbouring equal tiles (see bitboard.count_merges) a board can have
+                for the endgame solver to be tried. Every merge left makes the rest of the game longer
 
         core_params accepts floats. will convert all (except last one) to ints as required
 
@@ -32,6 +162,13 @@ def __init__(self, game, game_obj, core_params: np.ndarray = None, best_proporti
         self.verbose = verbose
         self.best_proportion = best_proportion
         self.core_params = core_params
+        self.batch_rollouts = batch_rollouts
+        self.legal_rollouts = legal_rollouts
+        self.rng = np.random.default_rng()
+        self.seed_rng = random.Random()  # seeds the per-rollout rngs
+        self.workers = workers
+        self.rollouts_per_task = 16  # big chance boards are split up so every worker gets a share
+        self.pool = None
 
         if core_params is None:
             core_params = np.array([500, 54, 18, 9, 6.25])
@@ -60,80 +197,160 @@ def __init__(self, game, game_obj, core_params: np.ndarray = None, best_proporti
         self.scaler_4 = core_params[4]
         self.depth_dict_4 = {key: math.ceil(value * 1 / self.scaler_4) for key, value in self.depth_dict_2.items()}
 
-        self.almost_lost_fix = 0
+        self.cache = None
+        if rollout_cache:
+            # enough of the best rollouts are kept for node_value at the biggest depth
+            top_k = math.ceil(max(self.depth_dict_2.values()) * best_proportion)
+            self.cache = RolloutCache(max_entries=rollout_cache, top_k=top_k)
+
+        self.rollout_horizon = rollout_horizon
+        self.bootstrap = heuristics.rollout_points_batch if bootstrap is None else bootstrap
+
+        if time_budget_ms is not None and not racing_rounds:
+            racing_rounds = 4
+        self.racing_rounds = racing_rounds
+        self.time_budget_ms = time_budget_ms
+        self.last_decision = None  # direction, values, rollouts per direction, rounds and seconds of the last move
+        self.chance_samples = chance_samples
+        self.common_random_numbers = common_random_numbers
+        self.move_seed = 0  # picked again every move, see stream_seeds
+        self.racing_confidence = racing_confidence
+        self.decision_rollouts = []  # rollouts played for every move made
+
+        self.endgame = endgame.EndgameSolver(max_nodes=endgame_nodes) if endgame_nodes else None
+        self.endgame_empty = endgame_empty
+        self.endgame_merges = endgame_merges
+        self.almost_lost_fix = 0  # only used if the endgame solver is off or the rest of the game is too big for it
 
     @staticmethod
-    def one_game(game):
+    def one_game(game, horizon: int = None):
         """
         Where all the magic happens: plays random moves until the game is over
         args:
             game (Game): game object to manipulate
+            horizon (int): if set, stop after this many moves even if the game isn't over
         """
-        while not game.game_over_check():
+        move_limit = math.inf if horizon is None else game.num_moves + horizon
+        while not game.game_over_check() and game.num_moves < move_limit:
             current_direction = np.random.randint(0, 4)
             game.move(current_direction, print_board=False, illegal_warn=False)
         else:
             return game.score
 
-    def n_games(self):
-        move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
-        projected_scores = []
-
-        for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
-
-            if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
-                # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
-                projected_scores.append(0)
-            else:
-                current_score = game_copy.score
-
-                # take board we're currently working on, get list of all possible tiles that could spawn
-                boards2, boards4 = self.get_possible_boards(game_copy.board)
+    @staticmethod
+    def one_game_legal(game, rng: random.Random, horizon: int = None):
+        """
+        one_game, but each step picks uniformly from the directions that are legal right now, so no step is wasted on
+        an illegal move. An illegal move doesn't change the game, so the scores have the same distribution as one_game
+        args:
+            game (Game): game object to manipulate
+            rng (random.Random): this rollout's own rng
+            horizon (int): if set, stop after this many moves even if the game isn't over
+        """
+        legal_directions = bitboard.LEGAL_DIRECTIONS
+        moves_left = math.inf if horizon is None else horizon
+        legal_moves = game.legal_moves()
+        while legal_moves and moves_left:  # legal_moves is 0 when the game is over
+            directions = legal_directions[legal_moves]
+            game.move(directions[int(rng.random() * len(directions))], print_board=False, illegal_warn=False)
+            moves_left -= 1
+            legal_moves = game.legal_moves()
+        return game.score
 
-                num_empty_tiles = len(boards2)
-                direction_scores_to_avg2, direction_scores_to_avg4 = [], []
-                for board in boards4:  # for each board, do necessary depth
-                    inner_scores4 = []
-                    for depth in range(self.depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
+    @staticmethod
+    def rollout_result(game, bootstrap=None) -> float:
+        """score of a finished rollout, plus bootstrap's estimate of the rest if it was stopped before game over"""
+        if bootstrap is None or game.game_over_check():
+            return game.score
+        return game.score + float(bootstrap(np.array([bitboard.pack(game.board.board)], dtype=np.uint64))[0])
 
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
-                        inner_scores4.append(current_inner_score)
-                    direction_scores_to_avg4.append(inner_scores4)
+    def n_games(self):
+        move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
+        start_time = time.perf_counter()
 
-                for board in boards2:  # this can be condensed, only diff is *9 in second for statement
-                    inner_scores2 = []
-                    for depth in range(self.depth_dict_2[num_empty_tiles]):
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
+        if self.common_random_numbers:
+            self.move_seed = self.seed_rng.getrandbits(64)
 
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
-                        inner_scores2.append(current_inner_score)
-                    direction_scores_to_avg2.append(inner_scores2)
+        # near the end the whole rest of the game may be small enough to search exactly, where rollouts mostly just lose
+        endgame_values = None
+        packed = bitboard.pack(self.main_game.board.board)
+        if (self.endgame is not None and bitboard.count_empty(packed) <= self.endgame_empty
+                and bitboard.count_merges(packed) <= self.endgame_merges):
+            endgame_values = self.endgame.solve(packed)
 
+        # find every chance board first so all of their rollouts can be played in one go
+        chance_nodes = {}  # direction: (score after moving, rollout jobs, probability weight of each job's board)
+        legal_moves = self.main_game.legal_moves() if endgame_values is None else 0  # nothing to roll out if solved
+        for direction in range(4):
+            if legal_moves & (1 << direction):
+                after_board, reward = self.main_game.afterstate(direction)
+                current_score = self.main_game.score + reward
+                if self.chance_samples:
+                    chance_nodes[direction] = (current_score, *self.sampled_chance_nodes(after_board, current_score))
+                else:
+                    # take board we're currently working on, get list of all possible tiles that could spawn
+                    boards2, boards4 = self.get_possible_boards(after_board)
+                    chance_nodes[direction] = (current_score, *self.possible_chance_nodes(current_score, boards2, boards4))
 
-                projected_scores.append(self.expected_value(direction_scores_to_avg4, direction_scores_to_avg2, num_empty_tiles))
+        rounds = 1
+        if endgame_values is not None:
+            direction_values = {direction: self.main_game.score + value
+                                for direction, value in enumerate(endgame_values) if value is not None}
+            direction_rollouts = {direction: 0 for direction in direction_values}
+            rounds = 0
+        elif self.time_budget_ms is not None:
+            deadline = start_time + self.time_budget_ms / 1000
+            direction_values, direction_rollouts, rounds = self.racing_direction_values(chance_nodes, deadline)
+        elif self.racing_rounds:
+            direction_values, direction_rollouts, rounds = self.racing_direction_values(chance_nodes)
+        else:
+            direction_values, direction_rollouts = {}, {}
+            all_jobs = [job for _, jobs, _ in chance_nodes.values() for job in jobs]
+            streams = None
+            if self.common_random_numbers:
+                streams = [(stream, 0) for _, jobs, _ in chance_nodes.values() for stream in range(len(jobs))]
+            node_values = iter(self.chance_node_values(all_jobs, streams))
+            for direction, (_, jobs, weights) in chance_nodes.items():
+                direction_values[direction] = self.expected_value([next(node_values) for _ in jobs], weights)
+                direction_rollouts[direction] = sum(num_rollouts for _, _, num_rollouts in jobs)
 
-                # finish evaluation, then add piece (because we need to generate states assuming the piece isn't there)
-                game_copy.add_new_tile()
+        projected_scores = []
+        for direction in range(4):
+            if direction not in direction_values:
+                # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
+                projected_scores.append(0)
+                continue
+            projected_scores.append(direction_values[direction])
 
         projected_scores = np.array(projected_scores)
-        if np.all(projected_scores == self.main_game.score):  # if all direction projected_scores are equal to the current then its about to end, which can cause an error. this makes it randomly cycle thru picking each move, which guarantees a legal one will be made so the game can end
+        if endgame_values is not None:  # exact, and only the legal directions have values
+            best_direction = max(direction_values, key=direction_values.get)
+        elif np.all(projected_scores == self.main_game.score):  # if all direction projected_scores are equal to the current then its about to end, which can cause an error. this makes it randomly cycle thru picking each move, which guarantees a legal one will be made so the game can end
             best_direction = self.almost_lost_fix
             self.almost_lost_fix += 1
             self.almost_lost_fix = self.almost_lost_fix % 4
         else:  # the normal case
             best_direction = np.argmax(projected_scores)
 
+        self.decision_rollouts.append(sum(direction_rollouts.values()))
+        self.last_decision = {"direction": int(best_direction),
+                              "values": direction_values,
+                              "rollouts": direction_rollouts,
+                              "rounds": rounds,
+                              "endgame": endgame_values is not None,
+                              "seconds": time.perf_counter() - start_time}
+
         if self.verbose:
             print(f"{np.array(projected_scores).round()}\t"
                   f"going {move_dict[best_direction]}\t"
                   f"score: {self.main_game.score}\t"
                   f"proj score: {round(max(projected_scores))}\n")
+            print(f"rollouts: {[direction_rollouts.get(direction, 0) for direction in range(4)]}\t"
+                  f"rounds: {rounds}\ttime: {self.last_decision['seconds']:.3f}s")
+            if self.cache is not None:
+                print(f"rollout cache: {self.cache.metrics()}")
+            if endgame_values is not None:
+                print(f"solved exactly: {self.endgame.nodes} nodes")
 
         self.main_game.move(best_direction)  # make the move
         if self.verbose and self.main_game.use_gui:
@@ -141,35 +358,376 @@ def n_games(self):
         return True  # returns true for continuing
 
 
-    def expected_value(self, scores4, scores2, num_empty):
+    def possible_chance_nodes(self, current_score: int, boards2: list, boards4: list) -> tuple[list, list]:
+        """
+        every chance board of a direction (from get_possible_boards), with depth_dict rollouts each
+        Returns:
+            tuple: (rollout jobs (board, score to start from, number of rollouts), probability of each board)
+        """
+        num_empty_tiles = len(boards2)
+        jobs = ([(board, current_score, self.depth_dict_4[num_empty_tiles]) for board in boards4]
+                + [(board, current_score, self.depth_dict_2[num_empty_tiles]) for board in boards2])
+        weights = [0.1 / num_empty_tiles] * len(boards4) + [0.9 / num_empty_tiles] * len(boards2)
+        return jobs, weights
+
+    def sampled_chance_nodes(self, after_board, current_score: int) -> tuple[list, list]:
+        """
+        self.chance_samples spawns drawn with the game's odds (see bitboard.spawn), one rollout each. A board drawn
+        more than once gets that many rollouts and that much weight, so the value is the plain average of every
+        rollout, an unbiased estimate whatever the number of empty tiles
+        Returns:
+            tuple: (rollout jobs (board, score to start from, number of rollouts), weight of each board)
+        """
+        packed = bitboard.pack(after_board.board)
+        if self.common_random_numbers:  # the k-th draw of every direction uses the same random number
+            draws = collections.Counter(bitboard.seeded_spawn(packed, _stream_seed(self.move_seed, -1, draw), 0)
+                                        for draw in range(self.chance_samples))
+        else:
+            draws = collections.Counter(bitboard.spawn(packed, self.seed_rng) for _ in range(self.chance_samples))
+        jobs = [(self.make_board(board), current_score, count) for board, count in draws.items()]
+        weights = [count / self.chance_samples for count in draws.values()]
+        return jobs, weights
+
+    def racing_direction_values(self, chance_nodes: dict, deadline: float = None) -> tuple[dict, dict, int]:
         """
-        Calculate the expected value based on scores4 and scores2 arrays. Uses top 2 values only
-        WHITEBOARD CALCULATION
+        adaptive alternative to giving every direction its full depth_dict rollouts: the same total budget is played in
+        self.racing_rounds rounds, and after each round a direction is dropped if its upper confidence bound is below
+        the lower bound of the leader. The rounds after that give its share to the directions still in the race.
+        With a deadline, the first round is just the one rollout every chance board needs to have a value, taken in
+        turn across the directions. Boards whose rollout hasn't started by the deadline are left out of their
+        direction's value (see scored_estimate). After that every round is sized from how long rollouts have taken so
+        far to fit in the time left, and no rollout is started after the deadline, so a move only goes over by the
+        rollouts that were already being played.
+        A direction that's the only legal one gets no rollouts at all (its value is just the score after moving)
         Args:
-            scores4 (list or ndarray): Scores monte carlo tree got for 4 spawning next.
-            scores2 (list or ndarray): Scores monte carlo tree got for 2 spawning next.
-            num_empty (int): Number of empty cells in the game board.
+            chance_nodes (dict): direction: (score after moving, rollout jobs, weights), as in n_games
+            deadline (float): time.perf_counter() time to be done by
 
         Returns:
-            float: The expected value.
+            tuple: (direction: value, direction: number of rollouts played for it, number of rounds played)
+        """
+        direction_jobs = {direction: jobs for direction, (_, jobs, _) in chance_nodes.items()}
+        budget = sum(num_rollouts for jobs in direction_jobs.values() for _, _, num_rollouts in jobs)
+        node_scores = {direction: [[] for _ in jobs] for direction, jobs in direction_jobs.items()}
+        allotted = {direction: [0.0] * len(jobs) for direction, jobs in direction_jobs.items()}  # fractional rollouts
+        racing = sorted(chance_nodes)
+        values = {direction: chance_nodes[direction][0] for direction in racing}
+
+        spent = 0
+        racing_round = 0
+        racing_start = time.perf_counter()
+        while len(racing) > 1:
+            if deadline is None:
+                if racing_round == self.racing_rounds:
+                    break
+                # this round's share of what's left of the budget
+                round_budget = (budget - spent) / (self.racing_rounds - racing_round)
+            elif racing_round == 0:
+                round_budget = 0  # only the first rollout of every board
+            else:
+                time_left = deadline - time.perf_counter()
+                if time_left <= 0:
+                    break
+                seconds_per_rollout = (time.perf_counter() - racing_start) / max(spent, 1)
+                round_budget = min(budget / self.racing_rounds, time_left / seconds_per_rollout)
+
+            # split between the directions left in proportion to their depth_dict rollouts
+            share = round_budget / sum(num_rollouts for direction in racing
+                                       for _, _, num_rollouts in direction_jobs[direction])
+            round_jobs, round_nodes, round_streams = [], [], []
+            for direction in racing:
+                for node, (board, current_score, num_rollouts) in enumerate(direction_jobs[direction]):
+                    allotted[direction][node] += num_rollouts * share
+                    played = len(node_scores[direction][node])
+                    # every board needs a score to have a value, after that the fractions add up over the rounds
+                    new_rollouts = max(int(allotted[direction][node]) - played, 0 if played else 1)
+                    if new_rollouts:
+                        round_jobs.append((board, current_score, new_rollouts))
+                        round_nodes.append(node_scores[direction][node])
+                        round_streams.append((node, played))
+            order = list(range(len(round_jobs)))
+            if racing_round == 0 and deadline is not None:
+                # first board of every direction, then the second..., so running out of time doesn't hit one direction
+                order.sort(key=lambda job_index: round_streams[job_index][0])
+            streams = [round_streams[job_index] for job_index in order] if self.common_random_numbers else None
+            for job_index, new_scores in zip(order, self.rollout_scores([round_jobs[job_index] for job_index in order],
+                                                                        streams, deadline)):
+                round_nodes[job_index] += new_scores
+                spent += len(new_scores)
+
+            bounds = {}
+            for direction in racing:
+                values[direction], spread = self.scored_estimate(direction_jobs[direction], node_scores[direction],
+                                                                 chance_nodes[direction][2])
+                bounds[direction] = (values[direction] - self.racing_confidence * spread,
+                                     values[direction] + self.racing_confidence * spread)
+            leader_lower = max(lower for lower, _ in bounds.values())
+            racing = [direction for direction in racing if bounds[direction][1] >= leader_lower]
+            racing_round += 1
+
+        rollouts = {direction: sum(len(scores) for scores in node_scores[direction]) for direction in chance_nodes}
+        return values, rollouts, racing_round
+
+    def scored_estimate(self, jobs: list, node_scores: list, weights: list) -> tuple[float, float]:
+        """
+        direction_estimate from only the chance boards that have rollout scores, with their weights scaled back up to
+        add to 1, so boards a deadline stopped from being played count as the average of the rest of their direction.
+        If none of them have been played yet, it's current score + bootstrap of every board, with an infinite
+        standard error so the direction stays in the race until it gets rollouts of its own
+        Args:
+            jobs (list): (board, score to start from, number of rollouts) of each chance board
+            node_scores (list): rollout scores so far of each chance board
+            weights (list): probability weight of each chance board
+        """
+        scored = [node for node, scores in enumerate(node_scores) if scores]
+        if len(scored) == len(node_scores):
+            return self.direction_estimate(node_scores, weights)
+        if not scored:
+            estimates = self.bootstrap(np.array([bitboard.pack(board.board) for board, _, _ in jobs], dtype=np.uint64))
+            return (self.expected_value([current_score + float(estimate)
+                                         for (_, current_score, _), estimate in zip(jobs, estimates)], weights),
+                    math.inf)
+        total_weight = sum(weights[node] for node in scored)
+        return self.direction_estimate([node_scores[node] for node in scored],
+                                       [weights[node] / total_weight for node in scored])
+
+    def direction_estimate(self, node_scores: list, weights: list) -> tuple[float, float]:
+        """
+        value of a direction from the rollout scores of its chance boards so far, and its standard error.
+        A board with a single score uses the variance of all of the direction's scores instead of its own
         """
-        scores2, scores4 = np.array(scores2), np.array(scores4)
+        value = self.expected_value([self.node_value(scores) for scores in node_scores], weights)
+
+        all_scores = [score for scores in node_scores for score in scores]
+        fallback = np.var(all_scores, ddof=1) if len(all_scores) > 1 else math.inf
+        variance = sum(weight ** 2 * (np.var(scores, ddof=1) if len(scores) > 1 else fallback) / len(scores)
+                       for weight, scores in zip(weights, node_scores))
+        return value, math.sqrt(variance)
+
+    def rollout_scores(self, rollout_jobs: list, streams: list = None, deadline: float = None) -> list:
+        """
+        plays the random games for a list of chance boards
+        Args:
+            rollout_jobs (list): (board, score to start from, number of rollouts) for each chance board
+            streams (list): (stream, index of the first rollout) for each job, to seed its rollouts from (see
+                stream_seeds) when using common random numbers
+            deadline (float): if set, no more rollouts are started once time.perf_counter() passes it, so jobs can
+                come back with fewer scores than they asked for, or none. A batch (batch_rollouts) is all or nothing
+
+        Returns:
+            list: for each job, list of the final score of each of its games
+        """
+        job_seeds = None
+        if streams is not None:
+            job_seeds = [self.stream_seeds(stream, first, num_rollouts)
+                         for (_, _, num_rollouts), (stream, first) in zip(rollout_jobs, streams)]
+
+        if not self.batch_rollouts:
+            if self.workers:
+                return self.parallel_rollout_scores(rollout_jobs, job_seeds, deadline)
+            if job_seeds is not None:
+                return [_seeded_rollouts(bitboard.pack(board.board), current_score, seeds, self.rollout_horizon,
+                                         self.bootstrap, deadline)
+                        for (board, current_score, _), seeds in zip(rollout_jobs, job_seeds)]
+            return [self.node_scores(*job, deadline=deadline) for job in rollout_jobs]
 
-        scores2_top = np.partition(scores2, -math.ceil((scores2.shape[1]) * self.best_proportion), axis=1)[:, -math.ceil((scores2.shape[1]) * self.best_proportion):]
+        if deadline is not None and time.perf_counter() > deadline:
+            return [[] for _ in rollout_jobs]
 
-        if scores4.shape[1] < 2:
-            scores4_top = scores4
+        # every rollout of every job is one game in a single batch
+        counts = [num_rollouts for _, _, num_rollouts in rollout_jobs]
+        boards = np.repeat(np.array([bitboard.pack(board.board) for board, _, _ in rollout_jobs], dtype=np.uint64), counts)
+        scores = np.repeat(np.array([score for _, score, _ in rollout_jobs], dtype=np.int64), counts)
+        seeds = None if job_seeds is None else np.array([seed for seeds in job_seeds for seed in seeds], dtype=np.uint64)
+        if self.workers:  # one slice of the batch per worker
+            slices = np.array_split(np.arange(len(boards)), self.workers)
+            final_scores = np.concatenate(list(self.rollout_pool().map(
+                _batch_rollout_task, [boards[s] for s in slices], [scores[s] for s in slices],
+                [self.legal_rollouts] * len(slices), [self.rollout_horizon] * len(slices),
+                [self.bootstrap] * len(slices), [None if seeds is None else seeds[s] for s in slices])))
         else:
-            scores4_top = np.partition(scores4, -math.ceil((scores4.shape[1]) * self.best_proportion), axis=1)[:, -math.ceil((scores4.shape[1]) * self.best_proportion):]
+            final_scores = _play_batch(batch_engine.BatchGames(boards, scores, self.rng, seeds), self.legal_rollouts,
+                                       self.rollout_horizon, self.bootstrap)
+        return [job_scores.tolist() for job_scores in np.split(final_scores, np.cumsum(counts)[:-1])]
+
+    def rollout_pool(self) -> ProcessPoolExecutor:
+        """the process pool for workers, made the first time it's needed and then reused for every move"""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_rollout_worker,
+                                            initargs=(self.seed_rng.getrandbits(32),))
+        return self.pool
+
+    def parallel_rollout_scores(self, rollout_jobs: list, job_seeds: list = None, deadline: float = None) -> list:
+        """
+        rollout_scores on the process pool, split into tasks of up to self.rollouts_per_task rollouts so the big
+        late game chance boards are shared between workers. Tasks that haven't started by the deadline are cancelled
+        """
+        pool = self.rollout_pool()
+        futures = []  # (job index, future)
+        for job_index, (board, current_score, num_rollouts) in enumerate(rollout_jobs):
+            packed = bitboard.pack(board.board)
+            for start in range(0, num_rollouts, self.rollouts_per_task):
+                task_rollouts = min(self.rollouts_per_task, num_rollouts - start)
+                task_seeds = None if job_seeds is None else job_seeds[job_index][start:start + task_rollouts]
+                futures.append((job_index, pool.submit(_rollout_task, packed, current_score, task_rollouts,
+                                                       self.legal_rollouts, self.rollout_horizon, self.bootstrap,
+                                                       task_seeds)))
+
+        job_scores = [[] for _ in rollout_jobs]
+        for job_index, future in futures:
+            if deadline is not None and time.perf_counter() > deadline and future.cancel():
+                continue
+            job_scores[job_index] += future.result()
+        return job_scores
+
+    def stream_seeds(self, stream: int, first: int, num_rollouts: int) -> list:
+        """
+        seeds for rollouts first to first + num_rollouts - 1 of a stream. A stream is the position of a chance board in
+        its direction, so every direction's k-th board plays its i-th rollout with the same seed this move
+        """
+        return [_stream_seed(self.move_seed, stream, index) for index in range(first, first + num_rollouts)]
+
+    def close(self):
+        """shuts down the rollout process pool if there is one"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def node_scores(self, board, current_score: int, num_rollouts: int, deadline: float = None) -> list:
+        """
+        final scores of num_rollouts random games played from one chance board
+        Args:
+            board: board (Board or BitBoard) after the new tile has spawned
+            current_score (int): score before the rollouts start
+            num_rollouts (int): how many games to play
+            deadline (float): if set, no more games are started once time.perf_counter() passes it
+
+        Returns:
+            list: final score of each game
+        """
+        # made once, every rollout plays on a clone of it
+        start_game = self.game_obj(board=board, use_gui=False)
+        start_game.score = current_score
+
+        scores = []
+        for depth in range(num_rollouts):
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            rollout_game = start_game.clone()
+            if self.legal_rollouts:
+                self.one_game_legal(rollout_game, random.Random(self.seed_rng.getrandbits(64)), self.rollout_horizon)
+            else:
+                self.one_game(rollout_game, self.rollout_horizon)
+            scores.append(self.rollout_result(rollout_game, self.bootstrap if self.rollout_horizon else None))
+        return scores
 
-        expected_value = 0
-        for node_scores in scores2_top:
-            expected_value += np.average(node_scores) * 0.9 * 1/ num_empty
-        # print(f"EXPECTED AFTER 2s {expected_value}")
-        for node_scores in scores4_top:
-            expected_value += np.average(node_scores) * 0.1 * 1/ num_empty
-        # print(f"EXPECTED AFTER 4s {expected_value}")
-        return expected_value
+    def chance_node_values(self, rollout_jobs: list, streams: list = None) -> list:
+        """
+        value (see node_value) of each chance board in rollout_jobs. Boards that are the same up to a rotation or
+        reflection (see symmetry) are only played out once, with the most rollouts any of them asked for, and share
+        what the rollouts gained on top of their own score
+        Args:
+            rollout_jobs (list): (board, score to start from, number of rollouts) for each chance board
+            streams (list): common random number streams of the jobs, see rollout_scores
+
+        Returns:
+            list: value of each chance board
+        """
+        keys = [self.cache_key(board) for board, _, _ in rollout_jobs]
+        unique = {}  # canonical board -> (index of the first job with it, most rollouts asked for)
+        for job_index, (key, (_, _, num_rollouts)) in enumerate(zip(keys, rollout_jobs)):
+            first_index, most_rollouts = unique.get(key, (job_index, 0))
+            unique[key] = (first_index, max(most_rollouts, num_rollouts))
+
+        unique_jobs = [rollout_jobs[first_index][:2] + (num_rollouts,) for first_index, num_rollouts in unique.values()]
+        unique_streams = None if streams is None else [streams[first_index] for first_index, _ in unique.values()]
+        gains = {key: value - current_score for key, value, (_, current_score, _)
+                 in zip(unique, self.played_node_values(unique_jobs, unique_streams), unique_jobs)}
+        return [current_score + gains[key] for key, (_, current_score, _) in zip(keys, rollout_jobs)]
+
+    def played_node_values(self, rollout_jobs: list, streams: list = None) -> list:
+        """
+        chance_node_values without the deduplication. With a rollout cache, only the rollouts a board doesn't already
+        have in the cache are played (and streams aren't used, the cached rollouts weren't played with them)
+        """
+        if self.cache is None:
+            return [self.node_value(scores) for scores in self.rollout_scores(rollout_jobs, streams)]
+
+        lookups = [self.cache.lookup(self.cache_key(board), num_rollouts) for board, _, num_rollouts in rollout_jobs]
+
+        # the first random step of each rollout is taken here, so its board can be recorded in the cache as well
+        step_jobs = []  # (job index, board after the first step, score gained by the first step, number of rollouts)
+        for job_index, ((board, current_score, _), (_, missing)) in enumerate(zip(rollout_jobs, lookups)):
+            packed = bitboard.pack(board.board)
+            first_steps = collections.Counter(self.random_step(packed) for _ in range(missing))
+            step_jobs += [(job_index, step_board, reward, count) for (step_board, reward), count in first_steps.items()]
+        new_scores = self.rollout_scores([(self.make_board(step_board), rollout_jobs[job_index][1] + reward, count)
+                                          for job_index, step_board, reward, count in step_jobs])
+
+        job_gains = [[] for _ in rollout_jobs]
+        for (job_index, step_board, reward, _), scores in zip(step_jobs, new_scores):
+            current_score = rollout_jobs[job_index][1]
+            job_gains[job_index] += [score - current_score for score in scores]
+            if reward or step_board != bitboard.pack(rollout_jobs[job_index][0].board):  # not a finished game
+                self.cache.record(self.cache_key(self.make_board(step_board)),
+                                  [score - current_score - reward for score in scores])
+
+        values = []
+        for (board, current_score, _), (stats, _), gains in zip(rollout_jobs, lookups, job_gains):
+            if gains:
+                self.cache.add(stats, gains)
+            values.append(current_score + stats.top_mean(self.best_proportion))
+        return values
+
+    def random_step(self, board: int) -> tuple[int, int]:
+        """
+        first step of a rollout on a packed board: a random legal move and a spawn
+        Returns:
+            tuple: (packed board after the step, score gained). (board, 0) if the game is already over
+        """
+        directions = bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]
+        if not directions:
+            return board, 0
+        new_board, reward, _ = bitboard.move(board, self.seed_rng.choice(directions))
+        return bitboard.spawn(new_board, self.seed_rng), reward
+
+    def make_board(self, packed: int):
+        """a board of the same type as the main game's from a packed board"""
+        if isinstance(self.main_game.board, BitBoard):
+            return BitBoard(packed=packed)
+        return Board(initial_board=bitboard.unpack(packed))
+
+    @staticmethod
+    def cache_key(board) -> int:
+        """key of a chance board in the rollout cache: the packed board, canonicalized so symmetric boards share it"""
+        return symmetry.canonical(bitboard.pack(board.board))
+
+    def node_value(self, scores) -> float:
+        """
+        value of one chance board: the average of the best self.best_proportion of its rollout scores
+        Args:
+            scores (list or ndarray): final scores of the rollouts played from the board
+
+        Returns:
+            float: the value
+        """
+        num_top = math.ceil(len(scores) * self.best_proportion)
+        return np.average(np.partition(scores, -num_top)[-num_top:])
+
+    @staticmethod
+    def expected_value(values, weights):
+        """
+        Calculate the expected value of a direction from the values of its chance boards
+        WHITEBOARD CALCULATION: every board with a 2 has weight 0.9 / num_empty and every board with a 4 has
+        0.1 / num_empty (see possible_chance_nodes), sampled boards the share of the draws they got
+        Args:
+            values (list): node_value of each chance board
+            weights (list): probability weight of each chance board
+
+        Returns:
+            float: The expected value.
+        """
+        return sum(weight * value for weight, value in zip(weights, values))
 
     @staticmethod
     def get_possible_boards(board) -> tuple[list, list]:
@@ -182,8 +740,8 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)
-                new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
+                new_board = board.clone()
+                new_board.add_tile(tile_value=new_tile_value, x_coord=x, y_coord=y)
 
                 if new_tile_value == 2:
                     boards2.append(new_board)
@@ -202,6 +760,7 @@ def run(self) -> tuple[int, float]:
             if self.main_game.use_gui and self.verbose:
                 self.main_game.display_updated_board()
         total_time = time.time() - start_time
+        self.close()
         print(f"GAME OVER: SCORE = {self.main_game.score}")
 
         save_game_result_to_csv("MDP2",
@@ -210,6 +769,9 @@ def run(self) -> tuple[int, float]:
                                 total_time,
                                 self.main_game.board.board,
                                 other_data={"num_moves": self.main_game.num_moves,
+                                            "rollouts_per_move": np.mean(self.decision_rollouts),
+                                            "time_budget_ms": self.time_budget_ms,
+                                            "endgame_solved": None if self.endgame is None else self.endgame.solved,
                                             "top_proportion": self.best_proportion,
                                             "core_param_0: (1-3)": self.core_params[0],
                                             "core_param_1: (4-6)": self.core_params[1],
@@ -217,4 +779,368 @@ def run(self) -> tuple[int, float]:
                                             "core_param_3: (10-15)": self.core_params[3],
                                             "core_param_4: 2/4 strength ratio": self.core_params[4]}
                                 )
-        return self.main_game.score, round(total_time/self.main_game.num_moves, 2)
\ No newline at end of file
+        return self.main_game.score, round(total_time/self.main_game.num_moves, 2)
+
+class Expectimax:
+    """
+    Depth-limited expectimax on packed boards (see bitboard). Instead of playing games out, it looks a few moves ahead
+    at every spawn that could happen and scores the boards it ends on with evaluate.
+    Values are the points gained from the board onwards plus evaluate at the end, so a board is worth the same however
+    it was reached, and afterstates are kept in a transposition table (keyed by their canonical board, see symmetry)
+    between moves
+    """
+    def __init__(self, game, depth_dict: dict = None, min_probability: float = 0.0001, evaluate=None,
+                 max_table_entries: int = 1_000_000, verbose: bool = False, evaluate_afterstate=None):
+        """
+        Args:
+            game: Game (or BitboardGame) object the AI should play
+            depth_dict (dict): number of empty tiles: how many moves to look ahead. Fewer empty tiles means fewer
+                spawns to branch on, and more danger, so the depth goes up as the board fills
+            min_probability (float): spawns less likely than this (the chance of getting there from the real board)
+                aren't searched any further, they're just evaluated
+            evaluate: function from a packed board to how good it is, heuristics.evaluate if not set
+            max_table_entries (int): the transposition table is cleared once it's bigger than this
+            verbose (bool): print every move
+            evaluate_afterstate: function for the afterstates cut off by min_probability, evaluate if not set
+        """
+        self.main_game = game
+        self.verbose = verbose
+        if depth_dict is None:
+            depth_dict = {num_empty: 2 for num_empty in range(6, 17)}
+            depth_dict.update({num_empty: 3 for num_empty in range(0, 6)})
+        self.depth_dict = depth_dict
+        self.min_probability = min_probability
+        self.evaluate = heuristics.evaluate if evaluate is None else evaluate
+        self.evaluate_afterstate = self.evaluate if evaluate_afterstate is None else evaluate_afterstate
+        self.max_table_entries = max_table_entries
+
+        self.table = {}  # canonical afterstate: (depth searched, value)
+        self.nodes = 0  # chance nodes searched, for verbose
+        self.table_hits = 0
+
+    def best_direction(self, board: int) -> tuple[int, list]:
+        """
+        Returns:
+            tuple: (best direction, expected points of each direction, None for illegal ones)
+        """
+        if len(self.table) > self.max_table_entries:
+            self.table.clear()
+        depth = self.depth_dict[bitboard.count_empty(board)]
+
+        values = [None] * 4
+        for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+            after_board, reward, _ = bitboard.move(board, direction)
+            values[direction] = reward + self.chance_value(after_board, depth, 1)
+        best = max((direction for direction in range(4) if values[direction] is not None), key=values.__getitem__)
+        return best, values
+
+    def max_value(self, board: int, depth: int, probability: float) -> float:
+        """value of a board where it's our turn: the best direction's reward plus the value of its afterstate"""
+        if depth == 0:
+            return self.evaluate(board)
+
+        best = 0  # a lost game gains nothing more
+        for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+            after_board, reward, _ = bitboard.move(board, direction)
+            best = max(best, reward + self.chance_value(after_board, depth, probability))
+        return best
+
+    def chance_value(self, board: int, depth: int, probability: float) -> float:
+        """
+        value of an afterstate: the average over every spawn (90% 2, 10% 4 in each empty tile) of the board after it,
+        searched depth - 1 more moves
+        """
+        if probability < self.min_probability:
+            return self.evaluate_afterstate(board)
+
+        key = symmetry.canonical(board)
+        cached = self.table.get(key)
+        if cached is not None and cached[0] >= depth:
+            self.table_hits += 1
+            return cached[1]
+        self.nodes += 1
+
+        empty = bitboard.empty_cells(board)
+        value = 0
+        for index in empty:
+            shift = 4 * index
+            value += 0.9 * self.max_value(board | (1 << shift), depth - 1, probability * 0.9 / len(empty))
+            value += 0.1 * self.max_value(board | (2 << shift), depth - 1, probability * 0.1 / len(empty))
+        value /= len(empty)  # a board that just moved always has an empty tile
+
+        self.table[key] = (depth, value)
+        return value
+
+    def next_move(self):
+        """picks and makes one move"""
+        move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
+        best_direction, values = self.best_direction(bitboard.pack(self.main_game.board.board))
+
+        if self.verbose:
+            print(f"{[None if value is None else round(value) for value in values]}\t"
+                  f"going {move_dict[best_direction]}\t"
+                  f"score: {self.main_game.score}\t"
+                  f"nodes: {self.nodes}\ttable hits: {self.table_hits}\n")
+
+        self.main_game.move(best_direction)
+        if self.verbose and self.main_game.use_gui:
+            self.main_game.board.print()
+
+    def run(self) -> tuple[int, float]:
+        """
+        Returns: (score, time per move)
+        """
+        start_time = time.time()
+        while not self.main_game.game_over_check():
+            self.next_move()
+
+            if self.main_game.use_gui and self.verbose:
+                self.main_game.display_updated_board()
+        total_time = time.time() - start_time
+        print(f"GAME OVER: SCORE = {self.main_game.score}")
+
+        save_game_result_to_csv("Expectimax",
+                                "Expectimax",
+                                self.main_game.score,
+                                total_time,
+                                self.main_game.board.board,
+                                other_data={"num_moves": self.main_game.num_moves,
+                                            "min_probability": self.min_probability,
+                                            "depth_dict": self.depth_dict}
+                                )
+        return self.main_game.score, round(total_time/self.main_game.num_moves, 2)
+
+
+class NTupleAgent(Expectimax):
+    """
+    Plays with an n-tuple network (see ntuple) as the value function. At depth 0 it's the one ply search the network
+    was trained for: the direction with the most reward + V(afterstate). Deeper, it's Expectimax with boards at the
+    bottom of the search valued by that one ply search, and afterstates cut off by min_probability valued by V directly
+    """
+    def __init__(self, game, network, depth: int = 0, min_probability: float = 0.001,
+                 max_table_entries: int = 1_000_000, verbose: bool = False):
+        """
+        Args:
+            game: Game (or BitboardGame) object the AI should play
+            network: ntuple.NTupleNetwork, or the path of one saved with NTupleNetwork.save (memory mapped, see
+                NTupleNetwork.load)
+            depth (int): moves to search with expectimax before using the network, 0 just uses the network
+            min_probability (float): like Expectimax's
+            max_table_entries (int): like Expectimax's
+            verbose (bool): print every move
+        """
+        if not isinstance(network, ntuple.NTupleNetwork):
+            network = ntuple.NTupleNetwork.load(network, mmap=True)
+        self.network = network
+        self.depth = depth
+        super().__init__(game, {num_empty: depth for num_empty in range(17)}, min_probability, network.board_value,
+                         max_table_entries, verbose, evaluate_afterstate=network.evaluate)
+
+    def best_direction(self, board: int) -> tuple[int, list]:
+        if self.depth > 0:
+            return super().best_direction(board)
+
+        values = [None] * 4
+        for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+            after_board, reward, _ = bitboard.move(board, direction)
+            values[direction] = reward + self.network.evaluate(after_board)
+        best = max((direction for direction in range(4) if values[direction] is not None), key=values.__getitem__)
+        return best, values
+
+    def run(self) -> tuple[int, float]:
+        """
+        Returns: (score, time per move)
+        """
+        start_time = time.time()
+        while not self.main_game.game_over_check():
+            self.next_move()
+
+            if self.main_game.use_gui and self.verbose:
+                self.main_game.display_updated_board()
+        total_time = time.time() - start_time
+        print(f"GAME OVER: SCORE = {self.main_game.score}")
+
+        save_game_result_to_csv("NTuple",
+                                "NTuple",
+                                self.main_game.score,
+                                total_time,
+                                self.main_game.board.board,
+                                other_data={"num_moves": self.main_game.num_moves,
+                                            "depth": self.depth,
+                                            "min_probability": self.min_probability,
+                                            "patterns": self.network.patterns}
+                                )
+        return self.main_game.score, round(total_time/self.main_game.num_moves, 2)
+
+
+class DecisionNode:
+    """MCTS node for a board where it's our turn to move. total is the sum of the points gained from it in every visit"""
+    __slots__ = ("board", "legal_directions", "children", "visits", "total")
+
+    def __init__(self, board: int) -> None:
+        self.board = board
+        self.legal_directions = bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]
+        self.children = {}  # direction: ChanceNode
+        self.visits = 0
+        self.total = 0.0
+
+
+class ChanceNode:
+    """MCTS node for an afterstate, waiting for a tile to spawn. children are keyed by the board after the spawn"""
+    __slots__ = ("board", "reward", "children", "visits", "total")
+
+    def __init__(self, board: int, reward: int) -> None:
+        self.board = board
+        self.reward = reward
+        self.children = {}  # packed board after the spawn: DecisionNode
+        self.visits = 0
+        self.total = 0.0
+
+
+class MCTS:
+    """
+    Monte Carlo Tree Search with UCT. Decision nodes pick a direction, chance nodes sample the spawn with the game's
+    odds, and a new leaf is valued with a random playout. After the real move, the subtree under the direction that
+    was played and the tile that actually spawned becomes the new root, so its visits count towards the next move
+    """
+    def __init__(self, game, iterations: int = 1000, exploration: float = 1.0, rollout_horizon: int = None,
+                 bootstrap=None, time_budget_ms: float = None, reuse_tree: bool = True, seed: int = None,
+                 verbose: bool = False):
+        """
+        Args:
+            game: Game (or BitboardGame) object the AI should play
+            iterations (int): visits the root should have before moving. Visits kept from the last move count, so
+                only the rest are played
+            exploration (float): UCT exploration constant, scaled by the parent's average points so it doesn't
+                depend on how far into the game it is
+            rollout_horizon (int): if set, playouts stop after this many moves and add bootstrap's estimate
+            bootstrap: same as MDP2's, heuristics.rollout_points_batch if not set
+            time_budget_ms (float): if set, stop iterating once this many milliseconds are up, even below iterations
+            reuse_tree (bool): keep the subtree under the real move and spawn for the next move
+            seed (int): seed for the playouts and spawns sampled in the tree
+            verbose (bool): print every move
+        """
+        self.main_game = game
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_horizon = rollout_horizon
+        self.bootstrap = heuristics.rollout_points_batch if bootstrap is None else bootstrap
+        self.time_budget_ms = time_budget_ms
+        self.reuse_tree = reuse_tree
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+
+        self.root = None
+        self.reused_visits = []  # visits the root already had at the start of every move
+        self.played_iterations = []  # iterations played for every move
+
+    def playout(self, board: int) -> float:
+        """points gained by random legal moves from a packed board until game over (or the horizon)"""
+        points, final_board = bitboard.random_game(board, self.rng, self.rollout_horizon)
+        if bitboard.legal_moves(final_board):  # stopped at the horizon
+            points += float(self.bootstrap(np.array([final_board], dtype=np.uint64))[0])
+        return points
+
+    def select_direction(self, node: DecisionNode) -> int:
+        """a direction that hasn't been tried yet, otherwise the one with the best UCT score"""
+        for direction in node.legal_directions:
+            if direction not in node.children:
+                return direction
+
+        scale = self.exploration * max(node.total / node.visits, 1)
+        log_visits = math.log(node.visits)
+        return max(node.legal_directions,
+                   key=lambda direction: node.children[direction].total / node.children[direction].visits
+                   + scale * math.sqrt(log_visits / node.children[direction].visits))
+
+    def visit(self, node: DecisionNode) -> float:
+        """one MCTS iteration from node: select, expand, play out and back up. Returns the points gained"""
+        if not node.legal_directions:  # game over
+            node.visits += 1
+            return 0
+        if node.visits == 0:  # a new leaf
+            value = self.playout(node.board)
+        else:
+            direction = self.select_direction(node)
+            chance = node.children.get(direction)
+            if chance is None:
+                after_board, reward, _ = bitboard.move(node.board, direction)
+                chance = ChanceNode(after_board, reward)
+                node.children[direction] = chance
+
+            spawned = bitboard.spawn(chance.board, self.rng)
+            child = chance.children.get(spawned)
+            if child is None:
+                child = DecisionNode(spawned)
+                chance.children[spawned] = child
+            value = chance.reward + self.visit(child)
+            chance.visits += 1
+            chance.total += value
+
+        node.visits += 1
+        node.total += value
+        return value
+
+    def search(self, board: int) -> DecisionNode:
+        """grows the tree from board until the root has self.iterations visits (or the time is up)"""
+        if self.root is None or self.root.board != board:
+            self.root = DecisionNode(board)
+        self.reused_visits.append(self.root.visits)
+
+        deadline = None if self.time_budget_ms is None else time.perf_counter() + self.time_budget_ms / 1000
+        played = 0
+        while self.root.visits < self.iterations:
+            if deadline is not None and time.perf_counter() > deadline and self.root.children:
+                break
+            self.visit(self.root)
+            played += 1
+        self.played_iterations.append(played)
+        return self.root
+
+    def next_move(self):
+        """picks and makes one move: the direction the search visited the most"""
+        move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
+        root = self.search(bitboard.pack(self.main_game.board.board))
+        best_direction = max(root.children, key=lambda direction: root.children[direction].visits)
+
+        if self.verbose:
+            print(f"{[root.children[d].visits if d in root.children else 0 for d in range(4)]}\t"
+                  f"going {move_dict[best_direction]}\t"
+                  f"score: {self.main_game.score}\t"
+                  f"reused visits: {self.reused_visits[-1]}\t"
+                  f"proj score: {round(self.main_game.score + root.children[best_direction].total / root.children[best_direction].visits)}\n")
+
+        self.main_game.move(best_direction)
+        if self.verbose and self.main_game.use_gui:
+            self.main_game.board.print()
+
+        # keep the subtree for what actually happened, if it has been seen
+        new_board = bitboard.pack(self.main_game.board.board)
+        self.root = root.children[best_direction].children.get(new_board) if self.reuse_tree else None
+
+    def run(self) -> tuple[int, float]:
+        """
+        Returns: (score, time per move)
+        """
+        start_time = time.time()
+        while not self.main_game.game_over_check():
+            self.next_move()
+
+            if self.main_game.use_gui and self.verbose:
+                self.main_game.display_updated_board()
+        total_time = time.time() - start_time
+        print(f"GAME OVER: SCORE = {self.main_game.score}")
+
+        save_game_result_to_csv("MCTS",
+                                "MCTS",
+                                self.main_game.score,
+                                total_time,
+                                self.main_game.board.board,
+                                other_data={"num_moves": self.main_game.num_moves,
+                                            "iterations": self.iterations,
+                                            "exploration": self.exploration,
+                                            "rollout_horizon": self.rollout_horizon,
+                                            "iterations_per_move": np.mean(self.played_iterations),
+                                            "reused_visits_per_move": np.mean(self.reused_visits)}
+                                )
+        return self.main_game.score, round(total_time/self.main_game.num_moves, 2)
@@ -1,5 +1,4 @@
 import statistics
-import copy
 import time
 import numpy as np
 import pandas as pd
@@ -209,7 +208,7 @@ def n_games(self):
         scores = []
         for direction in range(4):
 
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -281,7 +280,7 @@ def n_games(self):
         num_beat_attempts = 0
         while num_beat_attempts < 100:
             for direction in range(4):
-                game_copy = copy.deepcopy(self.main_game)
+                game_copy = self.main_game.clone()
 
                 if not game_copy.move(direction, print_board=False, illegal_warn=False):
                     # if it's illegal to move in the current direction, just add the current score to decision list
@@ -331,7 +330,7 @@ class MC4:
 
     FIRST WORKING DESIGN BC USES DEEPCOPY ON INNER OBJECT
     same as MC2 but
-    current_score = self.one_game(copy.deepcopy(game_copy)) instead of current_score = self.one_game(game_copy)
+    current_score = self.one_game(game_copy.clone()) instead of current_score = self.one_game(game_copy)
     one in MC2 resulted in direction_scores_to_avg being all the same number. this version doesn't
     """
     def __init__(self, game, sims_per_turn: int = 100, verbose: bool = True) -> None:
@@ -356,7 +355,7 @@ def n_games(self):
         move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
         scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
             if not game_copy.move(direction, print_board=False, illegal_warn=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
                 scores.append(game_copy.score)
@@ -364,7 +363,7 @@ def n_games(self):
                 direction_scores_to_avg = []
                 for sim in range(self.sims_per_turn):
                     # print(f"sim num {sim}")
-                    current_score = self.one_game(copy.deepcopy(game_copy))
+                    current_score = self.one_game(game_copy.clone())
                     direction_scores_to_avg.append(current_score)
                 # print("------------------------direction_scores_to_avg------------------------")
                 # print(direction_scores_to_avg)
@@ -437,7 +436,7 @@ def n_games(self):
         scores = []
         for direction in range(4):
 
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -446,7 +445,7 @@ def n_games(self):
                 direction_scores_to_avg = []
                 for sim in range(self.sims_per_turn):
                     # print(f"sim num {sim}")
-                    current_score = self.one_game(copy.deepcopy(game_copy))
+                    current_score = self.one_game(game_copy.clone())
                     direction_scores_to_avg.append(current_score)
                 direction_scores_to_avg_upper_quantile = np.sort(np.array(direction_scores_to_avg))[::-1][:50]
                 scores.append(np.average(direction_scores_to_avg_upper_quantile))
@@ -529,7 +528,7 @@ def n_games(self):
         scores = []
         for direction in range(4):
 
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -538,7 +537,7 @@ def n_games(self):
                 # THIS IS WHERE WE MAKE THE NODES START
                 # take board we're currently working on, get list of all possible tiles that could spawn
                 # print(f"There are {len(game_copy.board.get_empty_tiles())} empty squares")
-                tmp = copy.deepcopy(game_copy.board)
+                tmp = game_copy.board.clone()
                 boards2, boards4 = self.get_possible_boards(tmp)  # will deepcopying the boardhlp?
 
                 # print("BOARDS4 START")
@@ -547,16 +546,14 @@ def n_games(self):
                 num_open_tiles = len(boards2) # try increasing num open tiles to get rid of NAN?
                 direction_scores_to_avg = []
                 for board in boards4:  # for each board, do necessary depth
+                    # make new game obj with same score as current game
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_open_tiles]):
-
-                        # make new game obj with same score as current game
-
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
                         # print("MADE OBJ IN LOOP OF BOARDS4")
                         # current_game_obj.display_updated_board()  # temp line!
                         # time.sleep(1)
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg.append(current_score)
                         # print("DONE LOOP OF BOARDS4")
                 if num_open_tiles == 0:  # I THINK THIS IS WHATS CAUSING IT
@@ -579,12 +576,11 @@ def n_games(self):
                     print(f"len boards4, 2, depth dict: {len(boards4)}, {len(boards2)}, {depth_dict_4[num_open_tiles]}")
                     time.sleep(10)
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_open_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg.append(current_score)
 
                 # NOW ADD THE TILE ONCE ALL EVALUATING IS DONE??
@@ -633,7 +629,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         for new_tile_value in (2, 4):
             # print(f"board.get_empty_tiles() = {board.get_empty_tiles()}")
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=new_tile_value, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -703,7 +699,7 @@ def n_games(self):
         scores = []
         mc6_scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -719,25 +715,22 @@ def n_games(self):
                 num_empty_tiles = len(boards2)
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles]):
-
-                        # make new game obj
-
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
                         # print("MADE OBJ IN LOOP OF BOARDS4")
                         # current_game_obj.display_updated_board()  # temp line!
                         # time.sleep(1)
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg4.append(current_score)
                         # print("DONE LOOP OF BOARDS4")
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg2.append(current_score)
 
 
@@ -797,7 +790,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -870,7 +863,7 @@ def n_games(self):
         scores = []
         mc6_scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -886,25 +879,22 @@ def n_games(self):
                 num_empty_tiles = len(boards2)
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles]):
-
-                        # make new game obj
-
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
                         # print("MADE OBJ IN LOOP OF BOARDS4")
                         # current_game_obj.display_updated_board()  # temp line!
                         # time.sleep(1)
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg4.append(current_score)
                         # print("DONE LOOP OF BOARDS4")
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg2.append(current_score)
 
 
@@ -978,7 +968,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -1046,7 +1036,7 @@ def n_games(self):
         scores = []
         mc6_scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -1059,23 +1049,22 @@ def n_games(self):
                 num_empty_tiles = len(boards2)
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
                         # print("MADE OBJ IN LOOP OF BOARDS4")
                         # current_game_obj.display_updated_board()  # temp line!
                         # time.sleep(1)
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg4.append(current_score)
                         # print("DONE LOOP OF BOARDS4")
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         direction_scores_to_avg2.append(current_score)  # NEED TO GET IT SO THAT IT HAS A LIST FOR EACH NODE MAYBE ON A NEXT ITERATION IF THIS WORKS WELL
 
 
@@ -1135,7 +1124,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -1205,7 +1194,7 @@ def n_games(self):
         move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
         scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -1219,23 +1208,21 @@ def n_games(self):
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
                     inner_scores4 = []
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores4.append(current_score)
                     direction_scores_to_avg4.append(inner_scores4)
 
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
                     inner_scores2 = []
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores2.append(current_score)
                     direction_scores_to_avg2.append(inner_scores2)
 
@@ -1346,7 +1333,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -1420,7 +1407,7 @@ def n_games(self):
         scores = []
         highest_tile_locations = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -1438,23 +1425,21 @@ def n_games(self):
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
                     inner_scores4 = []
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores4.append(current_score)
                     direction_scores_to_avg4.append(inner_scores4)
 
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
                     inner_scores2 = []
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(depth_dict_4[num_empty_tiles] * 9):  # * 9 bc 90% chance of 2 spawning
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores2.append(current_score)
                     direction_scores_to_avg2.append(inner_scores2)
 
@@ -1547,7 +1532,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)  # THIS IS WHERE THE ERROR IS FROM
+                new_board = board.clone()  # THIS IS WHERE THE ERROR IS FROM
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
                 # print("MAGIC")
                 # new_board.print(2)
@@ -1645,7 +1630,7 @@ def n_games(self):
         move_dict = {0: "right", 1: "left", 2: "up", 3: "down"}
         scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -1659,23 +1644,21 @@ def n_games(self):
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
                     inner_scores4 = []
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(self.depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores4.append(current_score)
                     direction_scores_to_avg4.append(inner_scores4)
 
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
                     inner_scores2 = []
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = game_copy.score
                     for depth in range(self.depth_dict_2[num_empty_tiles]):
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = game_copy.score
-
-                        current_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_score = self.one_game(current_game_obj.clone())
                         inner_scores2.append(current_score)
                     direction_scores_to_avg2.append(inner_scores2)
 
@@ -1748,7 +1731,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)
+                new_board = board.clone()
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
 
                 if new_tile_value == 2:
@@ -1882,7 +1865,7 @@ def n_games(self):
         projected_scores = []
         immediate_scores = []
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -1899,23 +1882,21 @@ def n_games(self):
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
                     inner_scores4 = []
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = current_score
                     for depth in range(self.depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
-
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_inner_score = self.one_game(current_game_obj.clone())
                         inner_scores4.append(current_inner_score)
                     direction_scores_to_avg4.append(inner_scores4)
 
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
                     inner_scores2 = []
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = current_score
                     for depth in range(self.depth_dict_2[num_empty_tiles]):
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
-
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_inner_score = self.one_game(current_game_obj.clone())
                         inner_scores2.append(current_inner_score)
                     direction_scores_to_avg2.append(inner_scores2)
 
@@ -1990,7 +1971,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)
+                new_board = board.clone()
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
 
                 if new_tile_value == 2:
@@ -2109,7 +2090,7 @@ def n_games(self):
         projected_scores = []
 
         for direction in range(4):
-            game_copy = copy.deepcopy(self.main_game)
+            game_copy = self.main_game.clone()
 
             if not game_copy.move(direction, print_board=False, illegal_warn=False, add_tile=False):
                 # print(f"illegal to move {move_dict[direction]}")  # illegal warn but specifies direction
@@ -2124,23 +2105,21 @@ def n_games(self):
                 direction_scores_to_avg2, direction_scores_to_avg4 = [], []
                 for board in boards4:  # for each board, do necessary depth
                     inner_scores4 = []
+                    # make new game obj to play on where
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = current_score
                     for depth in range(self.depth_dict_4[num_empty_tiles]):
-                        # make new game obj to play on where
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
-
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_inner_score = self.one_game(current_game_obj.clone())
                         inner_scores4.append(current_inner_score)
                     direction_scores_to_avg4.append(inner_scores4)
 
                 for board in boards2:  # this can be condensed, only diff is *9 in second for statement
                     inner_scores2 = []
+                    # make new game obj
+                    current_game_obj = self.game_obj(board=board, use_gui=False)
+                    current_game_obj.score = current_score
                     for depth in range(self.depth_dict_2[num_empty_tiles]):
-                        # make new game obj
-                        current_game_obj = self.game_obj(board=board, use_gui=False)
-                        current_game_obj.score = current_score
-
-                        current_inner_score = self.one_game(copy.deepcopy(current_game_obj))
+                        current_inner_score = self.one_game(current_game_obj.clone())
                         inner_scores2.append(current_inner_score)
                     direction_scores_to_avg2.append(inner_scores2)
 
@@ -2211,7 +2190,7 @@ def get_possible_boards(board) -> tuple[list, list]:
         boards2, boards4 = [], []
         for new_tile_value in (2, 4):
             for y, x in board.get_empty_tiles():
-                new_board = copy.deepcopy(board)
+                new_board = board.clone()
                 new_board.add_tile(tile_value=2, x_coord=x, y_coord=y)
 
                 if new_tile_value == 2:
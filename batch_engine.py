@@ -0,0 +1,208 @@
+"""
+Vectorized engine that plays many games in lockstep
+
+boards are held as an (N,) np.uint64 array of packed boards (same layout as bitboard.py), and every operation is done
+for the whole batch at once with lookups into the numpy versions of move_tables. Moves, spawns and game overs follow
+the same rules as Game, so the rollout scores have the same distribution as MDP2.one_game
+"""
+import numpy as np
+import bitboard
+import move_tables
+
+ROW_MASK = np.uint64(0xFFFF)
+ROW_SHIFTS = np.array([0, 16, 32, 48], dtype=np.uint64)
+CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def counter_uniforms(seeds: np.ndarray, counters: np.ndarray) -> np.ndarray:
+    """
+    uniform [0, 1) numbers that only depend on (seed, counter): bitboard.counter_uniform for arrays (broadcast).
+    Lets a seeded game draw the same numbers whichever batch it's in and wherever it sits in it
+    """
+    with np.errstate(over="ignore"):
+        z = seeds + (counters.astype(np.uint64) + np.uint64(1)) * GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def transpose(boards: np.ndarray) -> np.ndarray:
+    """bitboard.transpose for an array of boards"""
+    a1 = boards & np.uint64(0xF0F00F0FF0F00F0F)
+    a2 = boards & np.uint64(0x0000F0F00000F0F0)
+    a3 = boards & np.uint64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << np.uint64(12)) | (a3 >> np.uint64(12))
+    b1 = a & np.uint64(0xFF00FF0000FF00FF)
+    b2 = a & np.uint64(0x00FF00FF00000000)
+    b3 = a & np.uint64(0x00000000FF00FF00)
+    return b1 | (b2 >> np.uint64(24)) | (b3 << np.uint64(24))
+
+
+def split_rows(boards: np.ndarray) -> np.ndarray:
+    """(N,) boards -> (N, 4) array of 16-bit rows, ready to index the move tables with"""
+    return ((boards[:, None] >> ROW_SHIFTS) & ROW_MASK).astype(np.intp)
+
+
+def join_rows(rows: np.ndarray) -> np.ndarray:
+    """inverse of split_rows"""
+    return np.bitwise_or.reduce(rows.astype(np.uint64) << ROW_SHIFTS, axis=1)
+
+
+def move(boards: np.ndarray, directions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    applies directions[i] to boards[i] without spawning
+    :param boards: (N,) np.uint64
+    :param directions: (N,) ints, 0 = right, 1 = left, 2 = up, 3 = down
+    :return: (new boards, score gained, whether the board moved)
+    """
+    vertical = directions >= 2
+    towards_high = (directions == 0) | (directions == 3)  # right and down
+
+    oriented = np.where(vertical, transpose(boards), boards)
+    rows = split_rows(oriented)
+    new_rows = np.where(towards_high[:, None], move_tables.ROW_RIGHT_ARRAY[rows], move_tables.ROW_LEFT_ARRAY[rows])
+    rewards = np.where(towards_high[:, None], move_tables.REWARD_RIGHT_ARRAY[rows],
+                       move_tables.REWARD_LEFT_ARRAY[rows]).sum(axis=1)
+
+    new_oriented = join_rows(new_rows)
+    new_boards = np.where(vertical, transpose(new_oriented), new_oriented)
+    return new_boards, rewards, new_boards != boards
+
+
+def spawn(boards: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """adds a 2 (90%) or a 4 (10%) to a random empty cell of every board that has one"""
+    cells = (boards[:, None] >> CELL_SHIFTS) & np.uint64(0xF)
+    empty = cells == 0
+    num_empty = empty.sum(axis=1)
+
+    # one draw per board picks the k-th empty cell and the value, like bitboard.SPAWN_DRAWS: 10 slots per empty
+    # cell and the first slot of each is a 4
+    draw = (rng.random(len(boards)) * (10 * num_empty)).astype(np.int64)
+    k = draw // 10
+    position = np.argmax(np.cumsum(empty, axis=1) > k[:, None], axis=1).astype(np.uint64)
+    exponent = np.where(draw % 10 == 0, 2, 1).astype(np.uint64)
+
+    spawned = boards | (exponent << (np.uint64(4) * position))
+    return np.where(num_empty > 0, spawned, boards)
+
+
+def legal_moves(boards: np.ndarray) -> np.ndarray:
+    """(N, 4) bool, [i, d] is true if direction d changes boards[i]"""
+    rows = split_rows(boards)
+    columns = split_rows(transpose(boards))
+    return np.stack([move_tables.CHANGED_RIGHT_ARRAY[rows].any(axis=1),
+                     move_tables.CHANGED_LEFT_ARRAY[rows].any(axis=1),
+                     move_tables.CHANGED_LEFT_ARRAY[columns].any(axis=1),
+                     move_tables.CHANGED_RIGHT_ARRAY[columns].any(axis=1)], axis=1)
+
+
+def random_legal_directions(boards: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """a uniformly random legal direction for every board (0 for boards with none)"""
+    legal = legal_moves(boards)
+    k = (rng.random(len(boards)) * legal.sum(axis=1)).astype(np.int64)
+    return np.argmax(np.cumsum(legal, axis=1) > k[:, None], axis=1)
+
+
+def seeded_spawn(boards: np.ndarray, seeds: np.ndarray, steps: np.ndarray) -> np.ndarray:
+    """bitboard.seeded_spawn for arrays: the empty cell with the highest priority from (seed, step) gets the tile"""
+    cells = (boards[:, None] >> CELL_SHIFTS) & np.uint64(0xF)
+    base = steps.astype(np.int64)[:, None] * bitboard.STEP_DRAWS
+    priorities = np.where(cells == 0, counter_uniforms(seeds[:, None], base + np.arange(16)), -1.0)
+    position = np.argmax(priorities, axis=1).astype(np.uint64)
+    four = counter_uniforms(seeds, base[:, 0] + bitboard.FOUR_DRAW) < 0.1
+    exponent = np.where(four, 2, 1).astype(np.uint64)
+    return np.where(priorities.max(axis=1) >= 0, boards | (exponent << (np.uint64(4) * position)), boards)
+
+
+def seeded_directions(boards: np.ndarray, seeds: np.ndarray, steps: np.ndarray) -> np.ndarray:
+    """bitboard.seeded_direction for arrays (0 for boards with no legal direction)"""
+    base = steps.astype(np.int64)[:, None] * bitboard.STEP_DRAWS + bitboard.DIRECTION_DRAWS
+    priorities = np.where(legal_moves(boards), counter_uniforms(seeds[:, None], base + np.arange(4)), -1.0)
+    return np.argmax(priorities, axis=1)
+
+
+def game_over(boards: np.ndarray) -> np.ndarray:
+    """true for every board that no direction can change"""
+    movable = move_tables.ROW_MOVABLE_ARRAY
+    rows_move = movable[split_rows(boards)].any(axis=1)
+    columns_move = movable[split_rows(transpose(boards))].any(axis=1)
+    return ~(rows_move | columns_move)
+
+
+class BatchGames:
+    """
+    N games advanced in lockstep. boards, scores and done are (N,) arrays that are updated in place.
+    With seeds, every game makes its random choices from its own seed instead of rng (always legal directions, see
+    bitboard.seeded_random_game), so games from similar boards with the same seed make the same choices wherever
+    they can
+    """
+    def __init__(self, boards: np.ndarray, scores: np.ndarray = None, rng: np.random.Generator = None,
+                 seeds: np.ndarray = None) -> None:
+        self.boards = np.asarray(boards, dtype=np.uint64).copy()
+        if scores is None:
+            scores = np.zeros(len(self.boards), dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.int64).copy()
+        self.num_moves = np.zeros(len(self.boards), dtype=np.int64)
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.done = game_over(self.boards)
+        self.seeds = None if seeds is None else np.asarray(seeds, dtype=np.uint64)
+
+    @classmethod
+    def from_board(cls, board: int, score: int, n: int, rng: np.random.Generator = None):
+        """n copies of one packed board"""
+        return cls(np.full(n, board, dtype=np.uint64), np.full(n, score, dtype=np.int64), rng)
+
+    def move(self, directions: np.ndarray, add_tile: bool = True, playing: np.ndarray = None) -> np.ndarray:
+        """
+        moves every unfinished game, same as Game.move for each of them (illegal moves leave the game untouched)
+        :param playing: (N,) bool, only move these games (every unfinished game if not given)
+        :return: (N,) bool, which games moved
+        """
+        active = np.flatnonzero(~self.done if playing is None else playing & ~self.done)
+        new_boards, rewards, moved = move(self.boards[active], np.asarray(directions)[active])
+        if add_tile and self.seeds is not None:
+            spawning = active[moved]
+            new_boards[moved] = seeded_spawn(new_boards[moved], self.seeds[spawning], self.num_moves[spawning])
+        elif add_tile:
+            new_boards[moved] = spawn(new_boards[moved], self.rng)
+
+        self.boards[active] = new_boards
+        self.scores[active] += rewards
+        self.num_moves[active] += moved
+        self.done[active[moved]] = game_over(new_boards[moved])
+
+        moved_all = np.zeros(len(self.boards), dtype=bool)
+        moved_all[active] = moved
+        return moved_all
+
+    def play_random(self, legal_only: bool = False, max_moves: int = None) -> np.ndarray:
+        """
+        plays uniformly random directions until every game is over, like MDP2.one_game. returns final scores
+        :param legal_only: only pick from each board's legal directions, so every step moves every game
+        :param max_moves: stop each game after this many more moves even if it isn't over (done says which ended)
+        """
+        move_limit = None if max_moves is None else self.num_moves + max_moves
+        while True:
+            playing = ~self.done if move_limit is None else ~self.done & (self.num_moves < move_limit)
+            if not playing.any():
+                break
+            if self.seeds is not None:
+                directions = np.zeros(len(self.boards), dtype=np.int64)
+                directions[playing] = seeded_directions(self.boards[playing], self.seeds[playing],
+                                                        self.num_moves[playing])
+            elif legal_only:
+                directions = np.zeros(len(self.boards), dtype=np.int64)
+                directions[playing] = random_legal_directions(self.boards[playing], self.rng)
+            else:
+                directions = self.rng.integers(0, 4, len(self.boards))
+            self.move(directions, playing=playing)
+        return self.scores
+
+
+def random_rollouts(board: int, score: int, n: int, rng: np.random.Generator = None, legal_only: bool = False,
+                    max_moves: int = None) -> np.ndarray:
+    """final scores of n random games started from one packed board"""
+    return BatchGames.from_board(board, score, n, rng).play_random(legal_only, max_moves)
@@ -0,0 +1,298 @@
+"""
+64-bit bitboard representation of a 2048 board
+
+every cell is stored as a 4-bit exponent (0 = empty, 1 = 2, 2 = 4, ..., 15 = 32768) in one python int.
+cell (x, y) lives in nibble 4 * y + x, so row y is bits 16y to 16y + 15 and moving left (towards x = 0) means moving
+towards the low nibble. Because of the 4 bit limit two 32768 tiles are never merged, and pack refuses anything bigger
+(game_logic.Game moves boards like that tile by tile instead).
+the rows themselves are collapsed by lookups into move_tables
+
+directions are the same as Game.move: 0 = right, 1 = left, 2 = up, 3 = down
+"""
+import random
+import move_tables
+
+ROW_MASK = 0xFFFF
+CELL_MASK = 0xF
+NIBBLE_LSB = 0x1111111111111111  # lowest bit of every nibble
+MAX_TILE = 1 << move_tables.MAX_EXPONENT  # 32768, the biggest tile a nibble holds
+
+
+def pack(rows: list) -> int:
+    """
+    packs a 4x4 list of tile values (board[y][x], like Board.board) into a 64-bit int.
+    Raises ValueError for tiles bigger than MAX_TILE, which don't fit in a nibble
+    """
+    board = 0
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row[:4]):
+            if tile:
+                if tile > MAX_TILE:
+                    raise ValueError(f"a {tile} tile can't be packed, the biggest a nibble holds is {MAX_TILE}")
+                board |= (tile.bit_length() - 1) << (4 * (4 * y + x))
+    return board
+
+
+def unpack(board: int) -> list[list[int]]:
+    """inverse of pack: returns a 4x4 list of tile values"""
+    rows = []
+    for y in range(4):
+        row = []
+        for x in range(4):
+            exponent = (board >> (4 * (4 * y + x))) & CELL_MASK
+            row.append(1 << exponent if exponent else 0)
+        rows.append(row)
+    return rows
+
+
+def transpose(board: int) -> int:
+    """swaps cell (x, y) with cell (y, x) using 3 rounds of masked shifts"""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def move(board: int, direction: int) -> tuple[int, int, int]:
+    """
+    applies a move without spawning a tile: 4 row lookups in move_tables, plus a transpose either side for up/down
+    :return: (new board, score gained, largest tile value made by a merge or 0). new board == board if illegal
+    """
+    if direction not in (0, 1, 2, 3):
+        raise ValueError("Only directions 0-3 are allowed. 0 = right, 1 = left, 2 = up, 3 = down")
+
+    vertical = direction in (2, 3)
+    if vertical:
+        board = transpose(board)
+    if direction in (0, 3):  # right and down move towards the high nibble
+        rows, rewards, merges = move_tables.ROW_RIGHT, move_tables.REWARD_RIGHT, move_tables.MERGE_RIGHT
+    else:
+        rows, rewards, merges = move_tables.ROW_LEFT, move_tables.REWARD_LEFT, move_tables.MERGE_LEFT
+
+    row0 = board & ROW_MASK
+    row1 = (board >> 16) & ROW_MASK
+    row2 = (board >> 32) & ROW_MASK
+    row3 = board >> 48
+    new_board = rows[row0] | (rows[row1] << 16) | (rows[row2] << 32) | (rows[row3] << 48)
+    reward = rewards[row0] + rewards[row1] + rewards[row2] + rewards[row3]
+    top_merge = max(merges[row0], merges[row1], merges[row2], merges[row3])
+
+    if vertical:
+        new_board = transpose(new_board)
+    return new_board, reward, (1 << top_merge) if top_merge else 0
+
+
+# the directions set in each 4-bit legal mask, so a rollout can pick one with a single random index
+LEGAL_DIRECTIONS = [tuple(direction for direction in range(4) if mask & (1 << direction)) for mask in range(16)]
+
+
+def legal_moves(board: int) -> int:
+    """
+    4-bit mask of the directions that change the board, bit d set if direction d is legal (1 << 0 = right, ...)
+    uses the changed flags in move_tables, so nothing is actually moved
+    """
+    left, right = move_tables.CHANGED_LEFT, move_tables.CHANGED_RIGHT
+    row0, row1, row2, row3 = board & ROW_MASK, (board >> 16) & ROW_MASK, (board >> 32) & ROW_MASK, board >> 48
+    transposed = transpose(board)
+    col0, col1, col2, col3 = (transposed & ROW_MASK, (transposed >> 16) & ROW_MASK,
+                              (transposed >> 32) & ROW_MASK, transposed >> 48)
+
+    mask = 0
+    if right[row0] or right[row1] or right[row2] or right[row3]:
+        mask |= 1
+    if left[row0] or left[row1] or left[row2] or left[row3]:
+        mask |= 2
+    if left[col0] or left[col1] or left[col2] or left[col3]:
+        mask |= 4
+    if right[col0] or right[col1] or right[col2] or right[col3]:
+        mask |= 8
+    return mask
+
+
+def _nonzero_flags(board: int) -> int:
+    """sets the lowest bit of every nonzero nibble (and clears everything else)"""
+    board |= board >> 2
+    board |= board >> 1
+    return board & NIBBLE_LSB
+
+
+def count_empty(board: int) -> int:
+    return 16 - _nonzero_flags(board).bit_count()
+
+
+def empty_cells(board: int) -> list[int]:
+    """returns the nibble index (4 * y + x) of every empty cell"""
+    return [i for i in range(16) if not (board >> (4 * i)) & CELL_MASK]
+
+
+def empty_mask(board: int) -> int:
+    """16-bit mask with bit i set if cell i (nibble index 4 * y + x) is empty"""
+    flags = ~_nonzero_flags(board) & NIBBLE_LSB  # bit 4i set for every empty cell
+    # squash the flags together: 16 bits 4 apart -> 2 per byte -> 4 per 16 bits -> 8 per 32 bits -> 16
+    flags = (flags | (flags >> 3)) & 0x0303030303030303
+    flags = (flags | (flags >> 6)) & 0x000F000F000F000F
+    flags = (flags | (flags >> 12)) & 0x000000FF000000FF
+    return (flags | (flags >> 24)) & 0xFFFF
+
+
+def has_merge(board: int) -> bool:
+    """whether any two neighbouring non-empty tiles are equal (and below 32768, so they can actually merge)"""
+    full_nibbles = board & (board >> 1) & (board >> 2) & (board >> 3) & NIBBLE_LSB  # 32768s can't merge
+    occupied = _nonzero_flags(board) & ~full_nibbles
+    horizontal = ~_nonzero_flags(board ^ (board >> 4)) & occupied & 0x0111011101110111
+    vertical = ~_nonzero_flags(board ^ (board >> 16)) & occupied & 0x0000111111111111
+    return bool(horizontal | vertical)
+
+
+def count_merges(board: int) -> int:
+    """number of pairs of neighbouring equal tiles (below 32768) that could merge, has_merge counted"""
+    full_nibbles = board & (board >> 1) & (board >> 2) & (board >> 3) & NIBBLE_LSB
+    occupied = _nonzero_flags(board) & ~full_nibbles
+    horizontal = ~_nonzero_flags(board ^ (board >> 4)) & occupied & 0x0111011101110111
+    vertical = ~_nonzero_flags(board ^ (board >> 16)) & occupied & 0x0000111111111111
+    return horizontal.bit_count() + vertical.bit_count()
+
+
+def max_tile(board: int) -> int:
+    """value of the largest tile, 0 for an empty board"""
+    exponent = max((board >> shift) & CELL_MASK for shift in range(0, 64, 4))
+    return 1 << exponent if exponent else 0
+
+
+def is_game_over(board: int) -> bool:
+    """true if no direction changes the board: 8 lookups in move_tables.ROW_MOVABLE"""
+    movable = move_tables.ROW_MOVABLE
+    transposed = transpose(board)
+    return not (movable[board & ROW_MASK] or movable[(board >> 16) & ROW_MASK]
+                or movable[(board >> 32) & ROW_MASK] or movable[board >> 48]
+                or movable[transposed & ROW_MASK] or movable[(transposed >> 16) & ROW_MASK]
+                or movable[(transposed >> 32) & ROW_MASK] or movable[transposed >> 48])
+
+
+def set_cell(board: int, index: int, exponent: int) -> int:
+    """returns board with the cell at nibble index set to exponent"""
+    shift = 4 * index
+    return (board & ~(CELL_MASK << shift)) | (exponent << shift)
+
+
+# BYTE_SELECT[byte][k] is the position of the k-th set bit of byte, so the k-th empty cell is 2 lookups away
+BYTE_SELECT = [tuple(bit for bit in range(8) if byte & (1 << bit)) for byte in range(256)]
+# a spawn is one draw from SPAWN_DRAWS[number of empty cells]: 10 (k, exponent) entries per empty cell, 9 of them a 2
+# and 1 a 4, so the cell and the value come out with the same odds as Game.add_new_tile
+SPAWN_DRAWS = [()] + [tuple((k, 2 if draw == 0 else 1) for k in range(n) for draw in range(10)) for n in range(1, 17)]
+
+
+def select_cell(empty: int, k: int) -> int:
+    """index of the k-th empty cell (counting from cell 0) of a 16-bit empty_mask"""
+    low = empty & 0xFF
+    low_count = low.bit_count()
+    if k < low_count:
+        return BYTE_SELECT[low][k]
+    return 8 + BYTE_SELECT[empty >> 8][k - low_count]
+
+
+def spawn(board: int, rng: random.Random = random) -> int:
+    """
+    adds a 2 (90%) or a 4 (10%) to a random empty cell in constant time, same odds as Game.add_new_tile
+    :param rng: anything with a choice method, the random module by default
+    """
+    empty = empty_mask(board)
+    num_empty = empty.bit_count()
+    if not num_empty:
+        return board
+
+    k, exponent = rng.choice(SPAWN_DRAWS[num_empty])
+    return board | (exponent << (4 * select_cell(empty, k)))
+
+
+def random_game(board: int, rng: random.Random = random, max_moves: int = None) -> tuple[int, int]:
+    """
+    plays uniformly random legal moves (with spawns) from a packed board until the game is over, or max_moves
+    :param rng: anything with random and choice methods, so a seeded random.Random gives the same game every time
+    :return: (points gained, final board). The game was stopped early if legal_moves(final board) isn't 0
+    """
+    points = 0
+    moves_left = -1 if max_moves is None else max_moves
+    directions = LEGAL_DIRECTIONS[legal_moves(board)]
+    while directions and moves_left:
+        board, reward, _ = move(board, directions[int(rng.random() * len(directions))])
+        board = spawn(board, rng)
+        points += reward
+        moves_left -= 1
+        directions = LEGAL_DIRECTIONS[legal_moves(board)]
+    return points, board
+
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+# every step of a seeded game uses the numbers (step * STEP_DRAWS + i): i = cell for the spawn cell priorities,
+# 16 + direction for the direction priorities and FOUR_DRAW for whether the spawn is a 4
+STEP_DRAWS = 32
+DIRECTION_DRAWS = 16
+FOUR_DRAW = 20
+
+
+def splitmix64(z: int) -> int:
+    """mixes a 64-bit int into a random looking one"""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+
+def counter_uniform(seed: int, counter: int) -> float:
+    """uniform [0, 1) number that only depends on (seed, counter). batch_engine.counter_uniforms does the same"""
+    return (splitmix64((seed + (counter + 1) * GOLDEN_GAMMA) & MASK64) >> 11) / (1 << 53)
+
+
+def seeded_spawn(board: int, seed: int, step: int) -> int:
+    """
+    spawn with numbers from (seed, step): every cell gets a random priority and the empty cell with the highest one
+    gets the tile. That's uniform over the empty cells like spawn, but two different boards with the same seed and
+    step pick the same cell whenever it's empty on both
+    """
+    base = seed + (step * STEP_DRAWS + 1) * GOLDEN_GAMMA
+    index = -1
+    top = -1
+    for cell in range(16):
+        if not (board >> (4 * cell)) & CELL_MASK:
+            priority = splitmix64((base + cell * GOLDEN_GAMMA) & MASK64)  # counter_uniform without the scaling
+            if priority > top:
+                index, top = cell, priority
+    if index < 0:
+        return board
+    exponent = 2 if counter_uniform(seed, step * STEP_DRAWS + FOUR_DRAW) < 0.1 else 1
+    return board | (exponent << (4 * index))
+
+
+def seeded_direction(board: int, seed: int, step: int) -> int:
+    """uniformly random legal direction picked the same way as seeded_spawn's cell, -1 if there is none"""
+    base = seed + (step * STEP_DRAWS + DIRECTION_DRAWS + 1) * GOLDEN_GAMMA
+    best = -1
+    top = -1
+    for direction in LEGAL_DIRECTIONS[legal_moves(board)]:
+        priority = splitmix64((base + direction * GOLDEN_GAMMA) & MASK64)
+        if priority > top:
+            best, top = direction, priority
+    return best
+
+
+def seeded_random_game(board: int, seed: int, max_moves: int = None) -> tuple[int, int]:
+    """
+    random_game with seeded_direction and seeded_spawn, so games from similar boards with the same seed make the same
+    choices wherever they can (common random numbers). Same game as batch_engine.BatchGames with the same seed
+    :return: (points gained, final board). The game was stopped early if legal_moves(final board) isn't 0
+    """
+    points = 0
+    step = 0
+    direction = seeded_direction(board, seed, step)
+    while direction >= 0 and step != max_moves:
+        board, reward, _ = move(board, direction)
+        board = seeded_spawn(board, seed, step)
+        points += reward
+        step += 1
+        direction = seeded_direction(board, seed, step)
+    return points, board
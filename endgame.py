@@ -0,0 +1,91 @@
+"""
+Exact expectimax for positions close to game over
+
+with only a couple of empty tiles and few merges left, the rest of the game is a small enough tree to search all the
+way down: every move, every spawn (90% 2, 10% 4 in each empty tile), until nothing can move. The value of a board is
+then exactly the points an optimal player still expects to make from it, instead of an estimate from rollouts (which
+near the end mostly lose straight away and can't tell the directions apart).
+boards are memoized by their canonical board (see symmetry), and the table is kept between moves since the next
+move's boards are in the tree that was just searched. A search that would need more than max_nodes boards, or go
+more than max_moves deep, gives up so the caller can fall back to something else
+"""
+import bitboard
+import symmetry
+
+
+class SearchTooLarge(Exception):
+    """the tree is bigger than the solver's budget"""
+
+
+class EndgameSolver:
+    """
+    solve gives the exact expected points of every direction from a packed board, or None if the rest of the game
+    is too big to search
+    """
+    def __init__(self, max_nodes: int = 20_000, max_moves: int = 40, max_table_entries: int = 1_000_000) -> None:
+        """
+        Args:
+            max_nodes (int): most boards searched (not counting ones already in the table) before a solve gives up
+            max_moves (int): most moves ahead a solve searches before giving up
+            max_table_entries (int): the table is cleared once it's bigger than this
+        """
+        self.max_nodes = max_nodes
+        self.max_moves = max_moves
+        self.max_table_entries = max_table_entries
+
+        self.table = {}  # canonical board where it's our turn: expected points still to come
+        self.nodes = 0  # boards searched by the current solve
+        self.solved = 0
+        self.too_large = 0
+
+    def solve(self, board: int):
+        """
+        Returns:
+            list: expected points (from board onwards) of each direction, None for illegal ones. None instead of the
+                list if the search was too large
+        """
+        if len(self.table) > self.max_table_entries:
+            self.table.clear()
+        self.nodes = 0
+
+        values = [None] * 4
+        try:
+            for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+                after_board, reward, _ = bitboard.move(board, direction)
+                values[direction] = reward + self.chance_value(after_board, 1)
+        except SearchTooLarge:
+            self.too_large += 1
+            return None
+        self.solved += 1
+        return values
+
+    def max_value(self, board: int, moves: int) -> float:
+        """expected points from a board where it's our turn, with the best direction"""
+        key = symmetry.canonical(board)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        legal_directions = bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]
+        if legal_directions and moves >= self.max_moves:
+            raise SearchTooLarge
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchTooLarge
+
+        best = 0  # a lost game gains nothing more
+        for direction in legal_directions:
+            after_board, reward, _ = bitboard.move(board, direction)
+            best = max(best, reward + self.chance_value(after_board, moves + 1))
+        # only boards whose whole subtree was searched get here, so everything in the table is exact
+        self.table[key] = best
+        return best
+
+    def chance_value(self, board: int, moves: int) -> float:
+        """expected points from an afterstate, averaged over every spawn"""
+        empty = bitboard.empty_cells(board)
+        value = 0
+        for index in empty:
+            shift = 4 * index
+            value += 0.9 * self.max_value(board | (1 << shift), moves) + 0.1 * self.max_value(board | (2 << shift), moves)
+        return value / len(empty)  # a board that just moved always has an empty tile
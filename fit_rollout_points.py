@@ -0,0 +1,79 @@
+"""
+Fits heuristics.ROLLOUT_POINTS_WEIGHTS, the default bootstrap for rollouts stopped at a horizon (MDP2, MCTS)
+
+the boards it's fitted on are the ones a truncated rollout actually stops on: boards from games played by Expectimax,
+from the first move to the last, each played on for a random number of random legal moves. Every board is labelled
+with the mean points of many random legal playouts from it (batch_engine), and log(1 + points) is fitted by least
+squares on heuristics.rollout_point_features. Those features are all bounded, and the fit is undone with exp, so the
+estimate is never below 0 and can't run away on boards unlike the ones it was fitted on
+"""
+import random
+import time
+import numpy as np
+import batch_engine
+import bitboard
+import heuristics
+from AI import Expectimax
+from game_logic import BitboardGame
+
+
+def agent_boards(num_games: int, every: int, min_probability: float, rng: random.Random, verbose: bool = False) -> list:
+    """every every-th board (where it's Expectimax's turn) of num_games games"""
+    boards = []
+    for game_number in range(num_games):
+        agent = Expectimax(BitboardGame(), min_probability=min_probability)
+        board = bitboard.spawn(bitboard.spawn(0, rng), rng)
+        score = num_moves = 0
+        start_time = time.time()
+        while bitboard.legal_moves(board):
+            if num_moves % every == 0:
+                boards.append(board)
+            direction, _ = agent.best_direction(board)
+            board, reward, _ = bitboard.move(board, direction)
+            board = bitboard.spawn(board, rng)
+            score += reward
+            num_moves += 1
+        if verbose:
+            print(f"game {game_number}: score {score}, largest tile {bitboard.max_tile(board)}, {num_moves} moves, "
+                  f"{round(time.time() - start_time)}s")
+    return boards
+
+
+def random_continuations(boards: list, max_moves: int, rng: random.Random) -> list:
+    """each board played on for between 0 and max_moves random legal moves, like a rollout stopped at its horizon"""
+    continued = []
+    for board in boards:
+        _, board = bitboard.random_game(board, rng, rng.randint(0, max_moves))
+        if bitboard.legal_moves(board):  # finished games never need a bootstrap
+            continued.append(board)
+    return continued
+
+
+def playout_points(boards: list, num_playouts: int, rng: np.random.Generator) -> np.ndarray:
+    """mean points of num_playouts random legal games from each board"""
+    games = batch_engine.BatchGames(np.repeat(np.array(boards, dtype=np.uint64), num_playouts), rng=rng)
+    return games.play_random(legal_only=True).reshape(len(boards), num_playouts).mean(axis=1)
+
+
+def fit(boards: list, points: np.ndarray) -> tuple[np.ndarray, float]:
+    """
+    least squares weights of log(1 + points) on rollout_point_features
+    :return: (weights, r^2 of the estimate against points)
+    """
+    features = heuristics.rollout_point_features(np.array(boards, dtype=np.uint64))
+    weights = np.linalg.lstsq(features, np.log1p(points), rcond=None)[0]
+    estimate = np.expm1(features @ weights)
+    r_squared = 1 - ((points - estimate) ** 2).sum() / ((points - points.mean()) ** 2).sum()
+    return weights, r_squared
+
+
+if __name__ == '__main__':
+    rng = random.Random(2048)
+    start = time.time()
+    boards = agent_boards(num_games=8, every=10, min_probability=0.001, rng=rng, verbose=True)
+    boards = random_continuations(boards, max_moves=50, rng=rng)
+    print(f"{len(boards)} boards in {round(time.time() - start)}s")
+
+    points = playout_points(boards, num_playouts=200, rng=np.random.default_rng(2048))
+    weights, r_squared = fit(boards, points)
+    print(f"ROLLOUT_POINTS_WEIGHTS = ({', '.join(f'{weight:.4g}' for weight in weights)})\tr^2 = {r_squared:.2f}")
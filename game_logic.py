@@ -1,31 +1,56 @@
 import random
 import colr
-from copy import copy
-import tkinter as tk
-import copy
 import numpy as np
 from typing import Union
+import bitboard
+
+TILE_COLOURS = {
+    65536: "569BE0",
+    32768: "#6BAED5",
+    16384: "#F0513B",
+    8192: "#27B053",
+    4096: "#54C98E", # used to be #FB736D
+    2048: "#EDC22E",
+    1024: "#EDC23F",
+    512: "#EDC850",
+    256: "#EDCC61",
+    128: "#EDCF72",
+    64: "#F65E3B",
+    32: "#F67C5F",
+    16: "#F59563",
+    8: "#F2B179",
+    4: "#EDE0C8",
+    2: "#EEE4DA",
+    0: "#CCC0B3"
+}
+
+
+def print_tiles(rows: list, highest=2):
+    """prints a 4x4 list of tile values to the terminal in colour"""
+    for row in rows:
+        for tile in row:
+            # FFFFFF is white, 000000 is black
+            if tile not in TILE_COLOURS:
+                colour = "#2E2C26"
+            else:
+                colour = TILE_COLOURS[tile]
+            print(colr.color(f"{tile}\t".expandtabs(highest + 2), back=colour, fore="000000"), end=" ")
+        print("")
 
-# todo
-# make islegal() method in Game() class which doesn't move any pieces but checks if a move is legal. should be just the move function without adding tile
 
 def new_window():
+    import tkinter as tk  # only imported once something is actually shown, so headless machines never need it
     window = tk.Tk()
     window.title("2048 Game")
     return window
 
 
-class Board:
-    def __init__(self, window=None, initial_board=None):
-        if initial_board is None:
-            self.board: list = [
-                [0, 0, 0, 0],
-                [0, 0, 0, 0],
-                [0, 0, 0, 0],
-                [0, 0, 0, 0]
-            ]
-        else:
-            self.board: list = initial_board
+class TkRenderer:
+    """
+    Tkinter window that draws a board. Kept separate from Board so that boards used in rollouts are pure data
+    """
+    def __init__(self, window=None):
+        import tkinter as tk
 
         if window is None:
             window = new_window()
@@ -42,20 +67,48 @@ def __init__(self, window=None, initial_board=None):
                 self.tiles[i - 1][j] = tk.Canvas(self.window, width=100, height=100)
                 self.tiles[i - 1][j].grid(row=i, column=j)
 
-    def __deepcopy__(self, memo):
-        # create a new game instance
-        cls = self.__class__
-        new_game = cls.__new__(cls)
+    def draw(self, rows: list, score):
+        for i in range(4):
+            for j in range(4):
+                tile_value = rows[i][j]
+                if tile_value not in TILE_COLOURS:
+                    colour = "#2E2C26"
+                else:
+                    colour = TILE_COLOURS[tile_value]
+                text_colour = "#000000" if tile_value > 0 else "#FFFFFF"
+                self.tiles[i][j].create_rectangle(10, 10, 90, 90, fill=colour)
+                self.tiles[i][j].create_text(50, 50, text=str(tile_value) if tile_value != 0 else '', fill=text_colour,
+                                             font=("Helvetica", 24))
+        self.score_label.config(text="Score: " + str(score))
+        self.window.update()
 
-        memo[id(self)] = new_game
 
-        # copy all attributes, but ignore the Tkinter ones
-        for k, v in self.__dict__.items():
-            if k in ("window", "tiles", "score_label"):
-                setattr(new_game, k, None)
-            else:
-                setattr(new_game, k, copy.deepcopy(v, memo))
-        return new_game
+class Board:
+    __slots__ = ("board", "renderer")
+
+    def __init__(self, window=None, initial_board=None):
+        if initial_board is None:
+            self.board: list = [
+                [0, 0, 0, 0],
+                [0, 0, 0, 0],
+                [0, 0, 0, 0],
+                [0, 0, 0, 0]
+            ]
+        else:
+            self.board: list = initial_board
+
+        # the window is only made the first time the board is drawn (tkinter_print), unless one is passed in
+        self.renderer = None if window is None else TkRenderer(window)
+
+    def clone(self):
+        """copy of the cells only, the copy gets its own renderer if it's ever drawn"""
+        new_board = Board.__new__(Board)
+        new_board.board = [row[:] for row in self.board]
+        new_board.renderer = None
+        return new_board
+
+    def __deepcopy__(self, memo):
+        return self.clone()
 
     def add_tile(self, tile_value: int, x_coord: int, y_coord: int):
         self.board[y_coord][x_coord] = tile_value
@@ -93,74 +146,12 @@ def move_tile(self, square1: tuple, square2: tuple, eat: bool = False) -> int:
         return 0
 
     def print(self, highest=2):
-        tile_colours = {
-            65536: "569BE0",
-            32768: "#6BAED5",
-            16384: "#F0513B",
-            8192: "#27B053",
-            4096: "#54C98E", # used to be #FB736D
-            2048: "#EDC22E",
-            1024: "#EDC23F",
-            512: "#EDC850",
-            256: "#EDCC61",
-            128: "#EDCF72",
-            64: "#F65E3B",
-            32: "#F67C5F",
-            16: "#F59563",
-            8: "#F2B179",
-            4: "#EDE0C8",
-            2: "#EEE4DA",
-            0: "#CCC0B3"
-        }
-
-        highest2 = copy.copy(highest)
-        #print(f"highest2 = {highest2}, highest = {highest}")
-        for row in self.board:
-            #print(f"higest2 = {highest2}")
-            for tile in row:
-                # FFFFFF is white, 000000 is black
-                if tile not in tile_colours:
-                    colour = "#2E2C26"
-
-                else:
-                    colour = tile_colours[tile]
-                print(colr.color(f"{tile}\t".expandtabs(highest2 + 2), back=colour, fore="000000"), end=" ")
-                # print(colr.color("32", back=tile_colours[32], fore="FFFFFF"))
-            print("")
+        print_tiles(self.board, highest)
 
     def tkinter_print(self, score):
-        tile_colours = {
-            65536: "569BE0",
-            32768: "#6BAED5",
-            16384: "#F0513B",
-            8192: "#27B053",
-            4096: "#54C98E", # used to be #FB736D
-            2048: "#EDC22E",
-            1024: "#EDC23F",
-            512: "#EDC850",
-            256: "#EDCC61",
-            128: "#EDCF72",
-            64: "#F65E3B",
-            32: "#F67C5F",
-            16: "#F59563",
-            8: "#F2B179",
-            4: "#EDE0C8",
-            2: "#EEE4DA",
-            0: "#CCC0B3"
-        }
-        for i in range(4):
-            for j in range(4):
-                tile_value = self.board[i][j]
-                if tile_value not in tile_colours:
-                    colour = "#2E2C26"
-                else:
-                    colour = tile_colours[tile_value]
-                text_colour = "#000000" if tile_value > 0 else "#FFFFFF"
-                self.tiles[i][j].create_rectangle(10, 10, 90, 90, fill=colour)
-                self.tiles[i][j].create_text(50, 50, text=str(tile_value) if tile_value != 0 else '', fill=text_colour,
-                                             font=("Helvetica", 24))
-        self.score_label.config(text="Score: " + str(score))
-        self.window.update()
+        if self.renderer is None:
+            self.renderer = TkRenderer()
+        self.renderer.draw(self.board, score)
 
     def get_empty_tiles(self):
         """
@@ -183,6 +174,15 @@ def __setitem__(self, coordinate: tuple, value: int):
 
 
 class Game:
+    """
+    a game on a list Board. Moves go through the packed tables in bitboard while every tile is below 32768; once a
+    32768 is on the board it falls back to sliding the tiles one at a time (slide_tiles), so 32768s still merge and
+    bigger tiles still move, as they always have on Game. BitboardGame can't hold a tile above 32768 or merge two of
+    them
+    """
+    __slots__ = ("score", "use_gui", "no_display", "board", "num_moves", "highest_tile", "empty_count", "can_merge",
+                 "empty_mask", "undo_stack")
+
     def __init__(self, board: Board = None, use_gui: bool = True, no_display: Union[int, bool] = 30) -> None:
         self.score: int = 0
         self.use_gui = use_gui
@@ -201,56 +201,91 @@ def __init__(self, board: Board = None, use_gui: bool = True, no_display: Union[
             self.board = board
         self.num_moves: int = 0
         self.highest_tile: int = 0
+        # kept up to date by move and add_new_tile so game_over_check doesn't need to scan the board
+        self.empty_count: int = 16
+        self.can_merge: bool = False
+        # bit 4 * y + x set if that square is empty (see bitboard.empty_mask), so spawns don't need to scan either
+        self.empty_mask: int = 0xFFFF
+        # what push_move and push_spawn changed, for pop: (rows, score, num_moves, highest_tile, empty_count,
+        # can_merge, empty_mask) from before each of them
+        self.undo_stack: list = []
+        self.refresh_board_stats()
+
+    def refresh_board_stats(self) -> None:
+        """
+        recomputes empty_count, can_merge and highest_tile from the board. Only needed after changing self.board
+        directly, move and add_new_tile keep them up to date themselves
+        """
+        rows = self.board.board
+        self.highest_tile = max(self.highest_tile, max(max(row) for row in rows))
+        if self.highest_tile < bitboard.MAX_TILE:
+            packed = bitboard.pack(rows)
+            self.empty_count = bitboard.count_empty(packed)
+            self.empty_mask = bitboard.empty_mask(packed)
+            self.can_merge = bitboard.has_merge(packed)
+            return
+
+        # too big to pack, see slide_tiles
+        self.empty_mask = sum(1 << (4 * y + x) for y in range(4) for x in range(4) if not rows[y][x])
+        self.empty_count = self.empty_mask.bit_count()
+        self.can_merge = any(rows[y][x] and ((x < 3 and rows[y][x] == rows[y][x + 1])
+                                             or (y < 3 and rows[y][x] == rows[y + 1][x]))
+                             for y in range(4) for x in range(4))
+
+    def clone(self):
+        """
+        copy of the game for search and rollouts: copies the cells, score, move count and highest tile (plus the
+        display settings and board stats) directly instead of going through copy.deepcopy
+        """
+        new_game = Game.__new__(Game)
+        # Board.clone inlined to save a call
+        new_board = Board.__new__(Board)
+        rows = self.board.board
+        new_board.board = [rows[0][:], rows[1][:], rows[2][:], rows[3][:]]
+        new_board.renderer = None
+        new_game.board = new_board
+        new_game.score = self.score
+        new_game.num_moves = self.num_moves
+        new_game.highest_tile = self.highest_tile
+        new_game.empty_count = self.empty_count
+        new_game.empty_mask = self.empty_mask
+        new_game.can_merge = self.can_merge
+        new_game.use_gui = self.use_gui
+        new_game.no_display = self.no_display
+        new_game.undo_stack = []
+        return new_game
 
     def __deepcopy__(self, memo):
-        # print("IN __deepcopy__")
-        # create a new game instance
-        cls = self.__class__
-        new_game = cls.__new__(cls)
-
-        memo[id(self)] = new_game
-
-        # copy all attributes, but ignore the Tkinter window
-        for k, v in self.__dict__.items():
-            if k == 'window':
-                # print("in if")
-                setattr(new_game, k, None)  # or whatever default value you prefer
-                # print("done if")
-            else:
-                # print(f"GAME in else for {k}: {v}")
-                setattr(new_game, k, copy.deepcopy(v, memo))
-                # print(f"GAME dn else for {k}: {v}")
-
-        return new_game
+        return self.clone()
 
     def setup_board(self) -> None:
         # this fn should be called in __init__
-
-        # pick which squares to use
-        x1, y1 = random.randint(0, 3), random.randint(0, 3)
-        # this thing with the loop prevents duplicates of the same square
-        x2, y2 = x1, y1
-        while x2 == x1 and y2 == y1:
-            x2, y2 = random.randint(0, 3), random.randint(0, 3)
-
-        # 90% chance of a tile being 2
-        # weird that this makes a list and I need to take the first element from it. can clean up later
-        tile1_value = random.choices([2, 4], weights=(0.9, 0.1))[0]
-        tile2_value = random.choices([2, 4], weights=(0.9, 0.1))[0]
-        # print(f"tile1 = {tile1_value}, tile2 = {tile2_value}")
-        self.board.add_tile(tile1_value, x1, y1)
-        self.board.add_tile(tile2_value, x2, y2)
+        # 2 tiles on different squares, each 90% chance of being a 2
+        self.add_new_tile()
+        self.add_new_tile()
 
     def add_new_tile(self) -> None:
-        tile_value = random.choices([2, 4], weights=(0.9, 0.1))[0]
-
-        x, y = random.randint(0, 3), random.randint(0, 3)
-        square_coord = [x, y]
-        while self.board[square_coord] != 0:
-            x, y = random.randint(0, 3), random.randint(0, 3)
-            square_coord = [x, y]
+        # one draw picks both the square and whether it's a 2 (90%) or a 4 (10%), see bitboard.SPAWN_DRAWS. The k-th
+        # empty square is looked up in empty_mask, in the same order as board.get_empty_tiles()
+        k, exponent = random.choice(bitboard.SPAWN_DRAWS[self.empty_mask.bit_count()])
+        y, x = divmod(bitboard.select_cell(self.empty_mask, k), 4)
+        self.spawn_tile(1 << exponent, x, y)
+
+    def spawn_tile(self, tile_value: int, x_coord: int, y_coord: int) -> None:
+        """puts tile_value on an empty square and updates the board stats, add_new_tile with the square chosen"""
+        x, y = x_coord, y_coord
         self.board.add_tile(tile_value, x, y)
 
+        # only the new tile's neighbours can give a new merge
+        self.empty_count -= 1
+        self.empty_mask &= ~(1 << (4 * y + x))
+        if tile_value > self.highest_tile:
+            self.highest_tile = tile_value
+        if not self.can_merge:
+            rows = self.board.board
+            self.can_merge = ((x > 0 and rows[y][x - 1] == tile_value) or (x < 3 and rows[y][x + 1] == tile_value)
+                              or (y > 0 and rows[y - 1][x] == tile_value) or (y < 3 and rows[y + 1][x] == tile_value))
+
     def display_updated_board(self):
         if self.num_moves % self.no_display == 0:
             if self.use_gui:
@@ -276,64 +311,109 @@ def move(self, direction: int, print_board: bool = True, illegal_warn: bool = Tr
         :param add_tile (bool) whether to add a new tile after sucesfully moving
         """
         # 0 = right, 1 = left, 2 = up, 3 = down
-        if direction not in (0, 1, 2, 3):
-            raise ValueError("Only directions 0-3 are allowed. 0 = right, 1 = left, 2 = up, 3 = down")
-
-        square_coord_list = []
-        if direction in (1, 2):  # left or up
-            # generate list of squares from left to right one row at a time, starting from top
-            for row_num in range(len(self.board.board)):
-                # print(row_num)
-                for i in range(4):
-                    # print(3 - i)
-                    # print(f"({i}, {row_num})")
-                    square_coord_list.append((i, row_num))
-        elif direction in (0, 3):    # right or down
-            for row_num in range(len(self.board.board)):
-                # print(row_num)
-                for i in range(4):
-                    # print(3 - i)
-                    # print(f"({i}, {row_num})")
-                    square_coord_list.append((3 - i, 3 - row_num))
-
-        # removes empty tiles
-        tiles_to_move = []
-        for square in square_coord_list:
-            if self.board.value_of_position(square[0], square[1]) != 0:
-                tiles_to_move.append(square)
-
-        not_moving_list = set()
-        for tile in tiles_to_move:
-            #print(f"---tile is {tile}--")
-            traverse = self.traverse_list(tile, direction, self.board)
-            # print(f"traverse of {tile}= {traverse}")
-            if not traverse[0]:
-                # print(f"{tile} not moving")
-                not_moving_list.add(tile)
-            else:
-                #print(f"{tile} moving to {traverse[0][-1]}")
-                #print(f"{tile}'s traverse = {traverse}")
-                xf, yf = traverse[0][-1]
-                add_to_score = self.board.move_tile(tile, (xf, yf), traverse[-1])
+        if self.highest_tile >= bitboard.MAX_TILE:  # the packed tables can't merge 32768s or hold anything bigger
+            if not self.slide_tiles(direction):
+                if illegal_warn:
+                    print("ILLEGAL MOVE!")
+                return False
+            self.refresh_board_stats()
+        else:
+            # each row is resolved with a lookup into move_tables instead of sliding the tiles one at a time
+            packed = bitboard.pack(self.board.board)
+            new_board, add_to_score, top_merge = bitboard.move(packed, direction)
+
+            if new_board == packed:
+                if illegal_warn:
+                    print("ILLEGAL MOVE!")
+                return False
+
+            self.board.board = bitboard.unpack(new_board)
+            self.score += add_to_score
+            if top_merge > self.highest_tile:
+                self.highest_tile = top_merge
+            self.empty_count = bitboard.count_empty(new_board)
+            self.empty_mask = bitboard.empty_mask(new_board)
+            self.can_merge = bitboard.has_merge(new_board)
+
+        if add_tile:
+            self.add_new_tile()
+
+        if print_board:
+            self.display_updated_board()
+
+        self.num_moves += 1
+        return True
+
+    def slide_tiles(self, direction: int) -> bool:
+        """
+        moves the tiles one at a time, the way Game always has: starting from the edge they move towards, every tile
+        slides as far as it can and merges with the first equal tile it runs into (so 2 2 4 -> 8). Adds the merges
+        to score and highest_tile but leaves the other board stats to the caller. Used by move for boards with a
+        32768 or bigger, which don't fit the packed tables
+        :return: whether anything moved
+        """
+        if direction in (1, 2):  # left or up: left to right one row at a time, starting from the top
+            squares = [(x, y) for y in range(4) for x in range(4)]
+        else:  # right or down: the other way round
+            squares = [(3 - x, 3 - y) for y in range(4) for x in range(4)]
+
+        moved = False
+        for square in squares:
+            if self.board.value_of_position(*square) == 0:
+                continue
+            traverse, eat = self.traverse_list(square, direction, self.board)
+            if traverse:
+                moved = True
+                add_to_score = self.board.move_tile(square, tuple(traverse[-1]), eat)
                 self.score += add_to_score
                 if add_to_score > self.highest_tile:
                     self.highest_tile = add_to_score
+        return moved
 
-        illegal_move = False
-        if set(not_moving_list) == set(tiles_to_move):
-            if illegal_warn:
-                print("ILLEGAL MOVE!")
+    def legal_moves(self) -> int:
+        """
+        4-bit mask of the legal directions without moving anything: bit d is set if direction d is legal,
+        e.g. mask & (1 << 2) for up. 0 means the game is over
+        """
+        if self.highest_tile >= bitboard.MAX_TILE:
+            return sum(1 << direction for direction in range(4) if self.clone().slide_tiles(direction))
+        return bitboard.legal_moves(bitboard.pack(self.board.board))
+
+    def push_move(self, direction: int) -> bool:
+        """
+        move without spawning a tile or printing, so that pop can undo it. For depth first search on one game instead
+        of a clone per branch. Nothing is pushed if the move is illegal
+        :return: whether the move was legal. The score it gained is the change in self.score
+        """
+        record = ([row[:] for row in self.board.board], self.score, self.num_moves, self.highest_tile,
+                  self.empty_count, self.can_merge, self.empty_mask)
+        if not self.move(direction, print_board=False, illegal_warn=False, add_tile=False):
             return False
+        self.undo_stack.append(record)
+        return True
 
-        if not illegal_move:
-            if add_tile:
-                self.add_new_tile()
+    def push_spawn(self, tile_value: int, x_coord: int, y_coord: int) -> None:
+        """spawn_tile, so that pop can undo it"""
+        self.undo_stack.append(([row[:] for row in self.board.board], self.score, self.num_moves, self.highest_tile,
+                                self.empty_count, self.can_merge, self.empty_mask))
+        self.spawn_tile(tile_value, x_coord, y_coord)
 
-        if print_board:
-            self.display_updated_board()
+    def pop(self) -> None:
+        """undoes the last push_move or push_spawn"""
+        (self.board.board, self.score, self.num_moves, self.highest_tile, self.empty_count, self.can_merge,
+         self.empty_mask) = self.undo_stack.pop()
 
-        self.num_moves += 1
-        return True
+    def afterstate(self, direction: int) -> tuple[Board, int]:
+        """
+        the board after moving in direction (before a new tile spawns) and the score it adds, without changing or
+        copying the game. An illegal direction gives back the same position with 0 reward, so check legal_moves first
+        """
+        if self.highest_tile >= bitboard.MAX_TILE:
+            game = self.clone()
+            game.slide_tiles(direction)
+            return game.board, game.score - self.score
+        new_board, reward, _ = bitboard.move(bitboard.pack(self.board.board), direction)
+        return Board(initial_board=bitboard.unpack(new_board)), reward
 
     def traverse_list(self, square: tuple, direction: int, board=None) -> list:
         if board is None:
@@ -418,20 +498,246 @@ def empty_square(self, square: tuple) -> bool:
         return self.board.value_of_position(x, y) == 0
 
     def game_over_check(self) -> bool:
-        for y in range(4):
-            for x in range(4):
-                if self.board.value_of_position(x, y) == 0:
-                    # Found an empty tile
-                    return False
-                if x < 3 and self.board.value_of_position(x, y) == self.board.value_of_position(x + 1, y):
-                    # Found adjacent tiles with the same value
-                    return False
-                if y < 3 and self.board.value_of_position(x, y) == self.board.value_of_position(x, y + 1):
-                    # Found adjacent tiles with the same value
-                    return False
-        # No empty tiles and no adjacent tiles with the same value
+        # no empty squares and no equal neighbours, both tracked as the game goes
+        return self.empty_count == 0 and not self.can_merge
+
+
+class BitBoard:
+    """
+    Board with the same interface as Board, but the cells are packed into one 64-bit int (see bitboard.py).
+    Never touches Tkinter, so it's cheap to make and copy
+    """
+    __slots__ = ("packed",)
+
+    def __init__(self, initial_board=None, packed: int = 0):
+        if initial_board is not None:
+            packed = bitboard.pack(initial_board)
+        self.packed: int = packed
+
+    def clone(self):
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.packed = self.packed
+        return new_board
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    @property
+    def board(self) -> list:
+        """4x4 list of tile values, same layout as Board.board. Built on every access so don't write to it"""
+        return bitboard.unpack(self.packed)
+
+    def add_tile(self, tile_value: int, x_coord: int, y_coord: int):
+        exponent = tile_value.bit_length() - 1 if tile_value else 0
+        self.packed = bitboard.set_cell(self.packed, 4 * y_coord + x_coord, exponent)
+
+    def value_of_position(self, x_coord: int, y_coord: int) -> int:
+        exponent = (self.packed >> (4 * (4 * y_coord + x_coord))) & bitboard.CELL_MASK
+        return 1 << exponent if exponent else 0
+
+    def tile_coords(self, tile_value: int) -> tuple:
+        """finds the coordinates (as x, y tuple) of the first occurrence of tile of value tile_value"""
+        for y, row in enumerate(self.board):
+            for x, tile in enumerate(row):
+                if tile == tile_value:
+                    return x, y
+
+    def print(self, highest=2):
+        print_tiles(self.board, highest)
+
+    def get_empty_tiles(self):
+        """
+        returns list of tuples (y, x) with empty squares
+        """
+        return [(index // 4, index % 4) for index in bitboard.empty_cells(self.packed)]
+
+    def __getitem__(self, coordinate: tuple) -> int:
+        x, y = coordinate
+        return self.value_of_position(x, y)
+
+    def __setitem__(self, coordinate: tuple, value: int):
+        x, y = coordinate
+        self.add_tile(value, x, y)
+
+
+class BitboardGame:
+    """
+    Drop in replacement for Game which plays on a BitBoard. Moves, scores and game overs are the same as Game
+    until there is a 32768 on the board (two of them never merge here, see bitboard), so it can be passed as game/game_obj to MDP2 and the all_AI_iterations agents.
+    There is no Tkinter display, use_gui is only accepted so the constructor matches Game
+    """
+    __slots__ = ("score", "use_gui", "no_display", "board", "num_moves", "highest_tile", "empty_count", "can_merge",
+                 "undo_stack")
+
+    def __init__(self, board: BitBoard = None, use_gui: bool = False, no_display: Union[int, bool] = 30) -> None:
+        self.score: int = 0
+        self.use_gui = False
+
+        if type(no_display) == bool:
+            if not no_display:
+                self.no_display = 1
+            if no_display:
+                self.no_display = np.inf
+        else:
+            self.no_display = no_display
+
+        if board is None:
+            self.board: BitBoard = BitBoard()
+        elif isinstance(board, BitBoard):
+            self.board = board
+        else:  # a Board
+            self.board = BitBoard(initial_board=board.board)
+        self.num_moves: int = 0
+        self.highest_tile: int = 0
+        # kept up to date by move and add_new_tile so game_over_check doesn't need to look at the board
+        self.empty_count: int = 16
+        self.can_merge: bool = False
+        # what push_move and push_spawn changed, for pop: (packed board, score, num_moves, highest_tile, empty_count,
+        # can_merge) from before each of them
+        self.undo_stack: list = []
+        self.refresh_board_stats()
+
+    def refresh_board_stats(self) -> None:
+        """
+        recomputes empty_count, can_merge and highest_tile from the board. Only needed after changing self.board
+        directly, move and add_new_tile keep them up to date themselves
+        """
+        self.empty_count = bitboard.count_empty(self.board.packed)
+        self.can_merge = bitboard.has_merge(self.board.packed)
+        self.highest_tile = max(self.highest_tile, bitboard.max_tile(self.board.packed))
+
+    def clone(self):
+        """copy of the game: the packed cells, score, move count and highest tile (plus the display settings)"""
+        new_game = BitboardGame.__new__(BitboardGame)
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.packed = self.board.packed
+        new_game.board = new_board
+        new_game.score = self.score
+        new_game.num_moves = self.num_moves
+        new_game.highest_tile = self.highest_tile
+        new_game.empty_count = self.empty_count
+        new_game.can_merge = self.can_merge
+        new_game.use_gui = self.use_gui
+        new_game.no_display = self.no_display
+        new_game.undo_stack = []
+        return new_game
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    def setup_board(self) -> None:
+        self.add_new_tile()
+        self.add_new_tile()
+
+    def add_new_tile(self) -> None:
+        old_board = self.board.packed
+        new_board = bitboard.spawn(old_board)
+        if new_board == old_board:  # no empty cells
+            return
+        self.board.packed = new_board
+
+        spawned = new_board ^ old_board
+        tile_value = 1 << (spawned >> (4 * ((spawned.bit_length() - 1) // 4)))
+        self.spawned(tile_value)
+
+    def spawn_tile(self, tile_value: int, x_coord: int, y_coord: int) -> None:
+        """puts tile_value on an empty square and updates the board stats, add_new_tile with the square chosen"""
+        self.board.add_tile(tile_value, x_coord, y_coord)
+        self.spawned(tile_value)
+
+    def spawned(self, tile_value: int) -> None:
+        """updates the board stats after tile_value has been put on an empty square"""
+        self.empty_count -= 1
+        if tile_value > self.highest_tile:
+            self.highest_tile = tile_value
+        if not self.can_merge:
+            self.can_merge = bitboard.has_merge(self.board.packed)
+
+    def display_updated_board(self):
+        if self.num_moves % self.no_display == 0:
+            print(f"--------------------SCORE: {self.score}--------------------")
+            self.board.print(highest=len(str(self.highest_tile)))
+
+    def left(self):
+        return self.move(1)
+
+    def right(self):
+        return self.move(0)
+
+    def up(self):
+        return self.move(2)
+
+    def down(self):
+        return self.move(3)
+
+    def move(self, direction: int, print_board: bool = True, illegal_warn: bool = True, add_tile=True) -> bool:
+        """returns whether it was successful
+        :param add_tile (bool) whether to add a new tile after sucesfully moving
+        """
+        # 0 = right, 1 = left, 2 = up, 3 = down
+        new_board, reward, top_merge = bitboard.move(self.board.packed, direction)
+        if new_board == self.board.packed:
+            if illegal_warn:
+                print("ILLEGAL MOVE!")
+            return False
+
+        self.board.packed = new_board
+        self.score += reward
+        if top_merge > self.highest_tile:
+            self.highest_tile = top_merge
+        self.empty_count = bitboard.count_empty(new_board)
+        self.can_merge = bitboard.has_merge(new_board)
+
+        if add_tile:
+            self.add_new_tile()
+
+        if print_board:
+            self.display_updated_board()
+
+        self.num_moves += 1
+        return True
+
+    def game_over_check(self) -> bool:
+        return self.empty_count == 0 and not self.can_merge
+
+    def legal_moves(self) -> int:
+        """
+        4-bit mask of the legal directions without moving anything: bit d is set if direction d is legal,
+        e.g. mask & (1 << 2) for up. 0 means the game is over
+        """
+        return bitboard.legal_moves(self.board.packed)
+
+    def afterstate(self, direction: int) -> tuple[BitBoard, int]:
+        """
+        the board after moving in direction (before a new tile spawns) and the score it adds, without changing or
+        copying the game. An illegal direction gives back the same position with 0 reward, so check legal_moves first
+        """
+        new_board, reward, _ = bitboard.move(self.board.packed, direction)
+        return BitBoard(packed=new_board), reward
+
+    def push_move(self, direction: int) -> bool:
+        """
+        move without spawning a tile or printing, so that pop can undo it. For depth first search on one game instead
+        of a clone per branch. Nothing is pushed if the move is illegal
+        :return: whether the move was legal. The score it gained is the change in self.score
+        """
+        record = (self.board.packed, self.score, self.num_moves, self.highest_tile, self.empty_count, self.can_merge)
+        if not self.move(direction, print_board=False, illegal_warn=False, add_tile=False):
+            return False
+        self.undo_stack.append(record)
         return True
 
+    def push_spawn(self, tile_value: int, x_coord: int, y_coord: int) -> None:
+        """spawn_tile, so that pop can undo it"""
+        self.undo_stack.append((self.board.packed, self.score, self.num_moves, self.highest_tile, self.empty_count,
+                                self.can_merge))
+        self.spawn_tile(tile_value, x_coord, y_coord)
+
+    def pop(self) -> None:
+        """undoes the last push_move or push_spawn"""
+        (self.board.packed, self.score, self.num_moves, self.highest_tile, self.empty_count,
+         self.can_merge) = self.undo_stack.pop()
+
 
 def run_game(game=None):
     if game is None:
@@ -538,6 +844,7 @@ def run_game(game=None):
         time.sleep(1)
         g.display_updated_board()
     print(time.time() - start)
+    import tkinter as tk
     tk.mainloop()
     # while True:
     #     start_time = time.time()
@@ -0,0 +1,96 @@
+"""
+Precomputed transitions for every possible 16-bit row (4 cells of 4-bit exponents, see bitboard.py)
+
+a row only has 16^4 = 65536 states, so instead of re-deriving how a row collapses on every move we work it out once
+for every row in both directions. A whole move is then 4 lookups (plus a transpose for up/down).
+LEFT means towards x = 0 (the low nibble), RIGHT towards x = 3
+
+every table comes as a python list (fast to index one row at a time) and as a numpy array (for whole batches).
+The arrays are built once and then memory mapped from table_store's cache, the lists are copied out of them
+"""
+import numpy as np
+import table_store
+
+MAX_EXPONENT = 15
+NUM_ROWS = 1 << 16
+TABLE_VERSION = 1  # bump whenever collapse_row changes, so cached tables get rebuilt
+
+
+def collapse_row(row: int, reverse: bool = False) -> tuple[int, int, int]:
+    """
+    slides one packed 16-bit row towards x = 0 (towards x = 3 if reverse) exactly like Game.move does.
+    Game.move slides tiles one at a time starting from the edge they move towards, and a tile merges with the first
+    tile it runs into if they're equal, so a freshly merged tile can absorb the next one (2 2 4 -> 8)
+    :return: (new row, score gained, exponent of the largest tile made by a merge)
+    """
+    cells = [(row >> (4 * i)) & 0xF for i in range(4)]
+    if reverse:
+        cells.reverse()
+
+    stack = []
+    reward = 0
+    top_merge = 0
+    for exponent in cells:
+        if exponent == 0:
+            continue
+        if stack and stack[-1] == exponent and exponent < MAX_EXPONENT:
+            stack[-1] = exponent + 1
+            reward += 1 << (exponent + 1)
+            top_merge = max(top_merge, exponent + 1)
+        else:
+            stack.append(exponent)
+
+    stack += [0] * (4 - len(stack))
+    if reverse:
+        stack.reverse()
+
+    new_row = 0
+    for i, exponent in enumerate(stack):
+        new_row |= exponent << (4 * i)
+    return new_row, reward, top_merge
+
+
+def build_tables(reverse: bool) -> tuple[list, list, list, list]:
+    """
+    :return: (result row, reward, largest merged exponent, changed flag) for every row, each a list of 65536
+    """
+    result, reward, merge, changed = [], [], [], []
+    for row in range(NUM_ROWS):
+        new_row, row_reward, row_merge = collapse_row(row, reverse)
+        result.append(new_row)
+        reward.append(row_reward)
+        merge.append(row_merge)
+        changed.append(new_row != row)
+    return result, reward, merge, changed
+
+
+TABLE_DTYPES = {"row": np.uint16, "reward": np.int64, "merge": np.uint8, "changed": bool}
+_built = {}  # "row_left" etc.: array, only filled if a table wasn't cached
+
+
+def build_array(name: str) -> np.ndarray:
+    """one table (e.g. "reward_right") as a numpy array. The first call builds every table for both directions"""
+    if not _built:
+        for direction, reverse in (("left", False), ("right", True)):
+            for kind, table in zip(TABLE_DTYPES, build_tables(reverse)):
+                _built[f"{kind}_{direction}"] = np.array(table, dtype=TABLE_DTYPES[kind])
+    return _built[name]
+
+
+def load_array(name: str) -> np.ndarray:
+    return table_store.load_table(f"move_tables_{name}", lambda: build_array(name), TABLE_VERSION)
+
+
+ROW_LEFT_ARRAY, ROW_RIGHT_ARRAY = load_array("row_left"), load_array("row_right")
+REWARD_LEFT_ARRAY, REWARD_RIGHT_ARRAY = load_array("reward_left"), load_array("reward_right")
+MERGE_LEFT_ARRAY, MERGE_RIGHT_ARRAY = load_array("merge_left"), load_array("merge_right")
+CHANGED_LEFT_ARRAY, CHANGED_RIGHT_ARRAY = load_array("changed_left"), load_array("changed_right")
+# whether the row can move at all, which is all game_over_check needs
+ROW_MOVABLE_ARRAY = CHANGED_LEFT_ARRAY | CHANGED_RIGHT_ARRAY
+_built.clear()
+
+ROW_LEFT, ROW_RIGHT = ROW_LEFT_ARRAY.tolist(), ROW_RIGHT_ARRAY.tolist()
+REWARD_LEFT, REWARD_RIGHT = REWARD_LEFT_ARRAY.tolist(), REWARD_RIGHT_ARRAY.tolist()
+MERGE_LEFT, MERGE_RIGHT = MERGE_LEFT_ARRAY.tolist(), MERGE_RIGHT_ARRAY.tolist()
+CHANGED_LEFT, CHANGED_RIGHT = CHANGED_LEFT_ARRAY.tolist(), CHANGED_RIGHT_ARRAY.tolist()
+ROW_MOVABLE = ROW_MOVABLE_ARRAY.tolist()
@@ -0,0 +1,144 @@
+"""
+N-tuple network: a value function for afterstates that is a sum of table lookups
+
+a tuple is a handful of cells (a pattern of nibble indices, see bitboard.py). The exponents in those cells make an index
+into that tuple's weight table, and a board is worth the sum of the weights it picks out. Every pattern is also read
+off the board's 7 other symmetries (see symmetry), sharing the same table, so the network doesn't care about rotations
+or reflections. With a trained set of weights (see td_training.py) V(afterstate) estimates the points still to come,
+so a move is worth reward + V(afterstate)
+"""
+import os
+import numpy as np
+import bitboard
+import symmetry
+import table_store
+
+# 2 lines and 2 squares of 4 cells, 65536 weights each (Szubert & Jaskowski, 2014). Small enough to train in python
+FOUR_TUPLE_PATTERNS = (
+    (0, 1, 2, 3),
+    (4, 5, 6, 7),
+    (0, 1, 4, 5),
+    (4, 5, 8, 9),
+)
+# the 6-tuples most strong 2048 networks use (Yeh et al., 2016). 16.7M weights each, 256MB for the 4 tables
+SIX_TUPLE_PATTERNS = (
+    (0, 1, 2, 3, 4, 5),
+    (4, 5, 6, 7, 8, 9),
+    (0, 1, 2, 4, 5, 6),
+    (4, 5, 6, 8, 9, 10),
+)
+
+# SYMMETRY_CELLS[transform][i] is the cell of the original board that ends up in cell i of symmetry.symmetries()[t]
+SYMMETRY_CELLS = np.array([[symmetry.transform_board(0xF << (4 * cell), transform).bit_length() // 4 for cell in range(16)]
+                           for transform in range(8)]).argsort(axis=1)
+
+
+class NTupleNetwork:
+    """
+    weight tables for a set of tuple patterns. evaluate scores one packed board, evaluate_batch an array of them,
+    and update moves a board's weights (for temporal difference learning)
+    """
+    def __init__(self, patterns: tuple = FOUR_TUPLE_PATTERNS, weights: list = None) -> None:
+        """
+        Args:
+            patterns (tuple): tuples of nibble indices, see FOUR_TUPLE_PATTERNS
+            weights (list): one np.float32 table of 16 ** len(pattern) weights per pattern, zeros if not given
+        """
+        self.patterns = tuple(tuple(pattern) for pattern in patterns)
+        if weights is None:
+            weights = [np.zeros(16 ** len(pattern), dtype=np.float32) for pattern in self.patterns]
+        if len(weights) != len(self.patterns):
+            raise ValueError(f"{len(weights)} weight tables for {len(self.patterns)} patterns")
+        self.weights = weights
+        # (pattern number, cells) for every pattern in every symmetry, read straight off the untransformed board
+        self.placements = [(pattern_number, tuple(int(SYMMETRY_CELLS[transform][cell]) for cell in pattern))
+                           for transform in range(8) for pattern_number, pattern in enumerate(self.patterns)]
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False):
+        """
+        network saved with save
+        :param mmap: map the weights read only from table_store's cache instead of reading them into memory, so every
+            process playing with the same file shares them. They're copied out of the .npz the first time, and again
+            whenever the file changes (replacing the old copy). update can't be used on a mapped network
+        """
+        with np.load(path, allow_pickle=False) as saved:
+            patterns = [tuple(int(cell) for cell in pattern[pattern >= 0]) for pattern in saved["patterns"]]
+            if not mmap:
+                return cls(patterns, [saved[f"weights_{i}"] for i in range(len(patterns))])
+
+        def read_weights(i: int) -> np.ndarray:
+            with np.load(path, allow_pickle=False) as saved:
+                return saved[f"weights_{i}"]
+
+        stat = os.stat(path)
+        version = table_store.version_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(patterns, [table_store.load_table(f"ntuple_{name}_{i}", lambda i=i: read_weights(i), version)
+                              for i in range(len(patterns))])
+
+    def save(self, path: str) -> None:
+        """saves the patterns and weights to an .npz file"""
+        longest = max(len(pattern) for pattern in self.patterns)
+        patterns = np.full((len(self.patterns), longest), -1, dtype=np.int64)
+        for i, pattern in enumerate(self.patterns):
+            patterns[i, :len(pattern)] = pattern
+        np.savez(path, patterns=patterns, **{f"weights_{i}": weights for i, weights in enumerate(self.weights)})
+
+    def indices(self, board: int) -> list:
+        """(pattern number, table index) of every weight the board uses, 8 per pattern"""
+        cells = [(board >> shift) & 0xF for shift in range(0, 64, 4)]
+        indices = []
+        for pattern_number, placement in self.placements:
+            index = 0
+            for i, cell in enumerate(placement):
+                index |= cells[cell] << (4 * i)
+            indices.append((pattern_number, index))
+        return indices
+
+    def evaluate(self, board: int) -> float:
+        """V of one packed afterstate"""
+        weights = self.weights
+        return float(sum(weights[pattern_number][index] for pattern_number, index in self.indices(board)))
+
+    def batch_indices(self, boards: np.ndarray) -> list:
+        """for every pattern, an (N, 8) array of the table index each board uses in each symmetry"""
+        boards = np.asarray(boards, dtype=np.uint64)
+        cells = ((boards[:, None] >> np.arange(0, 64, 4, dtype=np.uint64)) & np.uint64(0xF)).astype(np.int64)
+        images = cells[:, SYMMETRY_CELLS]  # (N, 8, 16)
+        indices = []
+        for pattern in self.patterns:
+            powers = 16 ** np.arange(len(pattern), dtype=np.int64)
+            indices.append(images[:, :, list(pattern)] @ powers)
+        return indices
+
+    def evaluate_batch(self, boards: np.ndarray) -> np.ndarray:
+        """evaluate for an (N,) np.uint64 array of packed afterstates"""
+        values = np.zeros(len(boards), dtype=np.float64)
+        for weights, indices in zip(self.weights, self.batch_indices(boards)):
+            values += weights[indices].sum(axis=1)
+        return values
+
+    def update(self, board: int, delta: float) -> None:
+        """adds delta, spread evenly over every weight the board uses, so its value goes up by delta"""
+        indices = self.indices(board)
+        step = delta / len(indices)
+        for pattern_number, index in indices:
+            self.weights[pattern_number][index] += step
+
+    def best_move(self, board: int) -> tuple[int, float]:
+        """
+        one ply search: the legal direction with the most reward + V(afterstate)
+        :return: (direction, its value), (-1, 0) if there is no legal move
+        """
+        best_direction, best_value = -1, 0.0
+        for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+            after_board, reward, _ = bitboard.move(board, direction)
+            value = reward + self.evaluate(after_board)
+            if best_direction < 0 or value > best_value:
+                best_direction, best_value = direction, value
+        return best_direction, best_value
+
+    def board_value(self, board: int) -> float:
+        """value of a board where it's our turn to move (best_move's value), 0 if the game is over"""
+        return self.best_move(board)[1]
@@ -0,0 +1,107 @@
+"""
+LRU cache of rollout statistics, so MDP2 can reuse rollouts from chance boards it has already played out
+
+rollouts are stored as gains (final score minus the score the rollout started from), so a board's statistics are
+valid however it was reached.
+chance boards never come up again at a later move (every spawn adds to the tile total), but the boards a rollout
+passes through do: the next move's chance boards are exactly the boards reached after the first random step of the
+rollouts from the real position. So MDP2 also records what its rollouts scored from there
+"""
+import heapq
+import math
+from collections import OrderedDict
+
+
+class RolloutStats:
+    """count, sum and the top_k largest gains of every rollout played from one board"""
+    __slots__ = ("count", "total", "top")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0
+        self.top: list = []  # min heap of the largest gains
+
+    def add(self, gains: list, top_k: int) -> None:
+        self.count += len(gains)
+        self.total += sum(gains)
+        for gain in gains:
+            if len(self.top) < top_k:
+                heapq.heappush(self.top, gain)
+            elif gain > self.top[0]:
+                heapq.heapreplace(self.top, gain)
+
+    def top_mean(self, proportion: float = 1) -> float:
+        """
+        average of the best proportion of the gains, like MDP2.node_value. Limited to the top_k that are kept
+        """
+        if proportion >= 1:
+            return self.total / self.count
+        num_top = min(math.ceil(self.count * proportion), len(self.top))
+        return sum(heapq.nlargest(num_top, self.top)) / num_top
+
+
+class RolloutCache:
+    """
+    maps a board key (e.g. a packed board) to its RolloutStats, evicting the least recently used board once there
+    are more than max_entries
+    """
+    def __init__(self, max_entries: int = 100_000, top_k: int = 500) -> None:
+        self.max_entries = max_entries
+        self.top_k = top_k
+        self.entries: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reused_rollouts = 0  # rollouts that didn't need to be played because they were cached
+
+    def lookup(self, key, wanted: int) -> tuple[RolloutStats, int]:
+        """
+        finds (or makes) the stats for key and counts it as a hit or miss
+        :param wanted: how many rollouts the caller wants from this board
+        :return: (stats, how many more rollouts need to be played to have wanted)
+        """
+        stats = self.entries.get(key)
+        if stats is None:
+            stats = RolloutStats()
+            self.entries[key] = stats
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.entries.move_to_end(key)
+
+        if stats.count:
+            self.hits += 1
+            self.reused_rollouts += min(stats.count, wanted)
+        else:
+            self.misses += 1
+        return stats, max(0, wanted - stats.count)
+
+    def add(self, stats: RolloutStats, gains: list) -> None:
+        stats.add(gains, self.top_k)
+
+    def record(self, key, gains: list) -> None:
+        """adds gains for a board nobody asked about yet (not counted as a hit or a miss)"""
+        stats = self.entries.get(key)
+        if stats is None:
+            stats = RolloutStats()
+            self.entries[key] = stats
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        stats.add(gains, self.top_k)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def metrics(self) -> dict:
+        """numbers to size the cache with"""
+        return {"entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "evictions": self.evictions,
+                "reused_rollouts": self.reused_rollouts}
@@ -0,0 +1,81 @@
+"""
+The 8 rotations and reflections of a packed board (see bitboard.py)
+
+a board and its mirror images are worth the same, as long as the directions are swapped to match. canonicalize picks
+the smallest of the 8 as the one to store, so caches and tables can share work between symmetric boards.
+
+a transform is a number 0-7 made of 3 flags, applied in this order:
+    1: flip horizontally (x -> 3 - x), right and left swap
+    2: flip vertically (y -> 3 - y), up and down swap
+    4: transpose (x <-> y), right <-> down and left <-> up
+"""
+import bitboard
+
+FLIP_HORIZONTAL = 1
+FLIP_VERTICAL = 2
+TRANSPOSE = 4
+
+# REVERSE_ROW[row] is the 16-bit row with its 4 cells in the opposite order
+REVERSE_ROW = [((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12) for row in range(1 << 16)]
+
+_DIRECTION_SWAPS = {FLIP_HORIZONTAL: (1, 0, 2, 3), FLIP_VERTICAL: (0, 1, 3, 2), TRANSPOSE: (3, 2, 1, 0)}
+
+
+def _direction_map(transform: int) -> tuple:
+    directions = (0, 1, 2, 3)
+    for flag in (FLIP_HORIZONTAL, FLIP_VERTICAL, TRANSPOSE):
+        if transform & flag:
+            directions = tuple(_DIRECTION_SWAPS[flag][direction] for direction in directions)
+    return directions
+
+
+# DIRECTION_MAP[transform][d] is the direction on the transformed board that does what d does on the original,
+# INVERSE_DIRECTION_MAP takes a direction picked on the transformed board back to the original
+DIRECTION_MAP = [_direction_map(transform) for transform in range(8)]
+INVERSE_DIRECTION_MAP = [tuple(mapping.index(direction) for direction in range(4)) for mapping in DIRECTION_MAP]
+
+
+def flip_horizontal(board: int) -> int:
+    """mirrors the board left to right: 4 lookups in REVERSE_ROW"""
+    return (REVERSE_ROW[board & 0xFFFF] | (REVERSE_ROW[(board >> 16) & 0xFFFF] << 16)
+            | (REVERSE_ROW[(board >> 32) & 0xFFFF] << 32) | (REVERSE_ROW[board >> 48] << 48))
+
+
+def flip_vertical(board: int) -> int:
+    """mirrors the board top to bottom by swapping whole rows"""
+    return (((board & 0xFFFF) << 48) | ((board & 0xFFFF0000) << 16)
+            | ((board >> 16) & 0xFFFF0000) | (board >> 48))
+
+
+def transform_board(board: int, transform: int) -> int:
+    """applies one of the 8 transforms (see the module docstring) to a packed board"""
+    if transform & FLIP_HORIZONTAL:
+        board = flip_horizontal(board)
+    if transform & FLIP_VERTICAL:
+        board = flip_vertical(board)
+    if transform & TRANSPOSE:
+        board = bitboard.transpose(board)
+    return board
+
+
+def symmetries(board: int) -> list[int]:
+    """all 8 images of the board, indexed by transform"""
+    horizontal = flip_horizontal(board)
+    flips = [board, horizontal, flip_vertical(board), flip_vertical(horizontal)]
+    return flips + [bitboard.transpose(flipped) for flipped in flips]
+
+
+def canonicalize(board: int) -> tuple[int, int]:
+    """
+    smallest of the board's 8 images
+    :return: (canonical board, transform that makes it). A direction d on board is DIRECTION_MAP[transform][d] on the
+        canonical board
+    """
+    images = symmetries(board)
+    canonical = min(images)
+    return canonical, images.index(canonical)
+
+
+def canonical(board: int) -> int:
+    """just the canonical board, for use as a key"""
+    return min(symmetries(board))
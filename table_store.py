@@ -0,0 +1,91 @@
+"""
+On-disk cache of lookup tables, loaded as read-only memory maps
+
+building move_tables or the heuristics line values takes most of a second in python, and every process (each pool
+worker under MDP2, bayesian_optimization, td_training) would do it again. Instead a table is built once, saved as an
+.npy file named after the table and its version, and every process after that maps the file read only: loading is a
+few milliseconds, and all the processes share the same pages of memory.
+
+bump a table's version whenever what it holds changes (a rule, a weight), so old files are never used by mistake.
+Saving a new version deletes the table's older ones, so the cache holds one file per table.
+Files go in TABLE_CACHE_DIR if it's set in the environment, table_cache next to this file otherwise. If the directory
+can't be written to, tables are just built in memory every time
+"""
+import glob
+import hashlib
+import os
+import numpy as np
+
+CACHE_DIR = os.environ.get("TABLE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "table_cache"))
+
+
+def table_path(name: str, version) -> str:
+    """file a table is cached in"""
+    return os.path.join(CACHE_DIR, f"{name}-v{version}.npy")
+
+
+def version_hash(*values) -> str:
+    """short version string that changes whenever any of values (numbers, strings, tuples) does"""
+    return hashlib.sha1(repr(values).encode()).hexdigest()[:12]
+
+
+def load_table(name: str, build, version=1) -> np.ndarray:
+    """
+    the cached table, read only and memory mapped. It's built (and saved for next time) if there is no file yet
+    Args:
+        name (str): name of the table, unique within CACHE_DIR
+        build: function with no arguments that makes the table as a numpy array
+        version: anything that changes when the table does, see version_hash
+
+    Returns:
+        np.ndarray: the table. Writing to it raises an error
+    """
+    path = table_path(name, version)
+    try:
+        return map_table(path)
+    except (FileNotFoundError, ValueError):  # not built yet, or a file that was only half written
+        pass
+
+    table = np.ascontiguousarray(build())
+    try:
+        save_table(path, table)
+    except OSError:
+        table.flags.writeable = False
+        return table
+    remove_old_versions(name, path)
+    return map_table(path)
+
+
+def map_table(path: str) -> np.ndarray:
+    """
+    an .npy file mapped read only. Returned as a plain ndarray over the mapping, since np.memmap makes every single
+    lookup about 4 times slower
+    """
+    return np.asarray(np.load(path, mmap_mode="r"))
+
+
+def save_table(path: str, table: np.ndarray) -> None:
+    """
+    writes a table to a temporary file and renames it into place, so other processes loading it at the same time
+    only ever see a whole file
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        np.save(file, table)
+    os.replace(temporary_path, path)
+
+
+def remove_old_versions(name: str, keep: str) -> None:
+    """
+    deletes every cached version of a table except the file keep. Processes that still have an old version mapped
+    keep their mapping, the file is only gone from the directory
+    """
+    prefix = os.path.join(CACHE_DIR, f"{name}-v")
+    for path in glob.glob(glob.escape(prefix) + "*.npy"):
+        version = path[len(prefix):-len(".npy")]
+        if path != keep and version.isalnum():  # not some other table whose name starts with this one's
+            try:
+                os.remove(path)
+            except OSError:  # already gone, or still open somewhere that won't allow it
+                pass
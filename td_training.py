@@ -0,0 +1,271 @@
+"""
+Temporal difference self-play training for ntuple networks
+
+every game is played greedily on the network (the move with the most reward + V(afterstate), see
+ntuple.NTupleNetwork.best_move) and after each move the previous afterstate is pulled towards what came next:
+    V(afterstate) += learning_rate * (next reward + V(next afterstate) - V(afterstate))
+with 0 as the target once the game is over. This is TD(0) on afterstates (Szubert & Jaskowski, 2014), played with the
+packed board rules of bitboard, the same ones game_logic.BitboardGame uses.
+
+the master weights live in shared memory, and every worker process trains on its own copy of them. A worker's network
+adds up how far each update moves every weight it touches (RecordingNetwork), and after games_per_merge games it sends
+back just those changes, which are added into the master weights. Before its next task a worker copies back from the
+master only the weights that some worker changed in the round before, which is all that can differ from its copy (a
+worker that missed a round copies everything). So a round costs the games plus work proportional to the weights the
+games touched, not the size of the tables. There are no locks: the parent adds each worker's changes while the others
+are still playing, and what a worker sends back is measured by its own updates, never against the live master weights
+"""
+import collections
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import bitboard
+import ntuple
+
+_worker_network = None  # each pool worker's own copy of the network (a RecordingNetwork), set by _init_td_worker
+_worker_master = None  # views of the master weights in shared memory
+_worker_blocks = None  # the shared memory blocks, kept so they stay attached
+_worker_synced_round = None  # the worker's copy has every change merged in this round and the ones before it
+
+
+class RecordingNetwork(ntuple.NTupleNetwork):
+    """
+    NTupleNetwork that also adds up how far update has moved each weight, so a worker only has to send back (and the
+    parent only has to merge) the weights its games actually touched
+    """
+    def __init__(self, patterns: tuple = ntuple.FOUR_TUPLE_PATTERNS, weights: list = None) -> None:
+        super().__init__(patterns, weights)
+        self.changes = [collections.defaultdict(float) for _ in self.patterns]  # table index: total change
+
+    def update(self, board: int, delta: float) -> None:
+        indices = self.indices(board)
+        step = delta / len(indices)
+        for pattern_number, index in indices:
+            self.weights[pattern_number][index] += step
+            self.changes[pattern_number][index] += step
+
+    def take_changes(self) -> list:
+        """
+        the changes since the last call, and starts recording again
+        :return: (changed indices, np.float32 change) for each table
+        """
+        changes = [(np.fromiter(table.keys(), dtype=np.int64, count=len(table)),
+                    np.fromiter(table.values(), dtype=np.float32, count=len(table))) for table in self.changes]
+        self.changes = [collections.defaultdict(float) for _ in self.patterns]
+        return changes
+
+
+def greedy_step(network: ntuple.NTupleNetwork, board: int):
+    """
+    the move the network would play
+    :return: (afterstate, reward, V(afterstate)), None if there is no legal move
+    """
+    best = None
+    for direction in bitboard.LEGAL_DIRECTIONS[bitboard.legal_moves(board)]:
+        after_board, reward, _ = bitboard.move(board, direction)
+        value = network.evaluate(after_board)
+        if best is None or reward + value > best[1] + best[2]:
+            best = (after_board, reward, value)
+    return best
+
+
+def td_game(network: ntuple.NTupleNetwork, learning_rate: float, rng: random.Random) -> tuple[int, int, int]:
+    """
+    plays one game from a new board, updating the network after every move
+    :return: (score, largest tile, number of moves)
+    """
+    board = bitboard.spawn(bitboard.spawn(0, rng), rng)
+    score = 0
+    num_moves = 0
+    step = greedy_step(network, board)
+    while step is not None:
+        after_board, reward, value = step
+        score += reward
+        num_moves += 1
+        board = bitboard.spawn(after_board, rng)
+        step = greedy_step(network, board)
+        target = 0.0 if step is None else step[1] + step[2]
+        network.update(after_board, learning_rate * (target - value))
+    return score, bitboard.max_tile(board), num_moves
+
+
+def train_games(network: ntuple.NTupleNetwork, num_games: int, learning_rate: float, seed: int) -> list:
+    """td_game num_games times, returns the (score, largest tile, number of moves) of each"""
+    rng = random.Random(seed)
+    return [td_game(network, learning_rate, rng) for _ in range(num_games)]
+
+
+def _init_td_worker(patterns: tuple, block_names: list, start_round: int) -> None:
+    """attaches a pool worker to the master weights and gives it its own copy of them to train"""
+    global _worker_network, _worker_master, _worker_blocks, _worker_synced_round
+    _worker_blocks = [shared_memory.SharedMemory(name=name) for name in block_names]
+    _worker_master = [np.ndarray((16 ** len(pattern),), dtype=np.float32, buffer=block.buf)
+                      for pattern, block in zip(patterns, _worker_blocks)]
+    _worker_network = RecordingNetwork(patterns, [master.copy() for master in _worker_master])
+    _worker_synced_round = start_round - 1
+
+
+def _td_task(num_games: int, learning_rate: float, seed: int, round_number: int, last_round_changed: list) -> tuple:
+    """
+    one worker's share of a round: catch up with the master weights, train, and send back what changed
+    :param last_round_changed: indices of every weight changed by the merges of round round_number - 1, per table
+    :return: (results of the games, (changed indices, change) for each table)
+    """
+    global _worker_synced_round
+    if _worker_synced_round == round_number - 2:  # only last round's merges are missing
+        for weights, master, changed in zip(_worker_network.weights, _worker_master, last_round_changed):
+            weights[changed] = master[changed]
+    elif _worker_synced_round < round_number - 2:  # missed a whole round, catch up with everything
+        for weights, master in zip(_worker_network.weights, _worker_master):
+            np.copyto(weights, master)
+    _worker_synced_round = round_number - 1
+
+    results = train_games(_worker_network, num_games, learning_rate, seed)
+    return results, _worker_network.take_changes()
+
+
+class TDTrainer:
+    """
+    trains a network with td_game on a pool of worker processes (see the module docstring), merging the workers'
+    updates every round and saving the network every checkpoint_every games
+    """
+    def __init__(self, network: ntuple.NTupleNetwork = None, workers: int = None, learning_rate: float = 0.1,
+                 games_per_merge: int = 20, checkpoint_path: str = None, checkpoint_every: int = 1000,
+                 seed: int = None, verbose: bool = False):
+        """
+        Args:
+            network (ntuple.NTupleNetwork): network to train, a new one with ntuple.FOUR_TUPLE_PATTERNS if not set.
+                Its weights are moved into shared memory
+            workers (int): number of worker processes, os.cpu_count() if not set. 0 trains in this process
+            learning_rate (float): fraction of the TD error corrected by each update
+            games_per_merge (int): games each worker plays between merges. More means less time spent merging, but
+                the workers drift further apart before they see each other's updates
+            checkpoint_path (str): .npz file the network is saved to (see NTupleNetwork.save), not saved if not set
+            checkpoint_every (int): games between checkpoints (rounded up to whole rounds)
+            seed (int): seed for the games
+            verbose (bool): print every round
+        """
+        self.network = ntuple.NTupleNetwork() if network is None else network
+        self.workers = os.cpu_count() if workers is None else workers
+        self.learning_rate = learning_rate
+        self.games_per_merge = games_per_merge
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.verbose = verbose
+        self.seed_rng = random.Random(seed)
+
+        self.pool = None
+        self.blocks = []
+        if self.workers:
+            shared_weights = []
+            for weights in self.network.weights:
+                block = shared_memory.SharedMemory(create=True, size=max(weights.nbytes, 1))
+                shared = np.ndarray(weights.shape, dtype=np.float32, buffer=block.buf)
+                shared[:] = weights
+                self.blocks.append(block)
+                shared_weights.append(shared)
+            self.network.weights = shared_weights
+
+        self.rounds = 0
+        self.last_round_changed = [np.zeros(0, dtype=np.int64) for _ in self.network.patterns]
+        self.games_played = 0
+        self.training_time = 0.0
+        self.results = []  # (score, largest tile, number of moves) of every game
+        self.last_checkpoint = 0
+
+    def training_pool(self) -> ProcessPoolExecutor:
+        """the process pool, made the first time it's needed"""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_td_worker,
+                                            initargs=(self.network.patterns, [block.name for block in self.blocks],
+                                                      self.rounds))
+        return self.pool
+
+    def train_round(self) -> list:
+        """
+        one round: every worker plays games_per_merge games, then their updates are added into the network
+        :return: results of the round's games
+        """
+        if not self.workers:
+            return train_games(self.network, self.games_per_merge, self.learning_rate, self.seed_rng.getrandbits(64))
+
+        pool = self.training_pool()
+        futures = [pool.submit(_td_task, self.games_per_merge, self.learning_rate, self.seed_rng.getrandbits(64),
+                               self.rounds, self.last_round_changed) for _ in range(self.workers)]
+        results = []
+        changed_tables = [[] for _ in self.network.patterns]
+        for future in futures:
+            worker_results, deltas = future.result()
+            results += worker_results
+            # workers that changed the same weight have both of their changes added, the same as if they had played
+            # one after the other without seeing each other's update
+            for weights, (changed, change), changed_table in zip(self.network.weights, deltas, changed_tables):
+                weights[changed] += change
+                changed_table.append(changed)
+        self.last_round_changed = [np.unique(np.concatenate(changed)) for changed in changed_tables]
+        self.rounds += 1
+        return results
+
+    def train(self, num_games: int) -> list:
+        """
+        trains for at least num_games games (whole rounds)
+        :return: results of the games played
+        """
+        results = []
+        while len(results) < num_games:
+            start_time = time.time()
+            round_results = self.train_round()
+            self.training_time += time.time() - start_time
+            results += round_results
+            self.games_played += len(round_results)
+
+            if self.verbose:
+                scores = [score for score, _, _ in round_results]
+                print(f"games: {self.games_played}\t"
+                      f"mean score: {round(np.mean(scores))}\t"
+                      f"best tile: {max(tile for _, tile, _ in round_results)}\t"
+                      f"games/hour: {round(self.games_per_hour)}")
+
+            if self.checkpoint_path and self.games_played - self.last_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+        self.results += results
+        return results
+
+    @property
+    def games_per_hour(self) -> float:
+        return 3600 * self.games_played / self.training_time if self.training_time else 0
+
+    def checkpoint(self) -> None:
+        """saves the network to checkpoint_path, through a temporary file so a crash never leaves half a checkpoint"""
+        path = self.checkpoint_path if self.checkpoint_path.endswith(".npz") else self.checkpoint_path + ".npz"
+        temporary_path = path[:-len(".npz")] + ".tmp.npz"
+        self.network.save(temporary_path)
+        os.replace(temporary_path, path)
+        self.last_checkpoint = self.games_played
+
+    def close(self) -> None:
+        """
+        shuts down the workers and frees the shared memory. The network keeps a copy of its weights, so it can still
+        be used afterwards
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.blocks:
+            self.network.weights = [weights.copy() for weights in self.network.weights]
+            for block in self.blocks:
+                block.close()
+                block.unlink()
+            self.blocks = []
+
+
+if __name__ == '__main__':
+    trainer = TDTrainer(checkpoint_path="ntuple_weights.npz", verbose=True)
+    try:
+        trainer.train(100_000)
+    finally:
+        trainer.close()
+    trainer.checkpoint()
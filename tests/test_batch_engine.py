@@ -0,0 +1,42 @@
+import random
+import numpy as np
+import batch_engine
+import bitboard
+
+
+def random_boards(n: int, seed: int) -> list:
+    """boards from random games, stopped after a random number of moves"""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(n):
+        start = bitboard.spawn(bitboard.spawn(0, rng), rng)
+        boards.append(bitboard.random_game(start, rng, rng.randint(0, 300))[1])
+    return boards
+
+
+def test_batch_moves_match_bitboard():
+    boards = random_boards(200, 0)
+    for direction in range(4):
+        new_boards, rewards, moved = batch_engine.move(np.array(boards, dtype=np.uint64), np.full(len(boards), direction))
+        for board, new_board, reward, board_moved in zip(boards, new_boards, rewards, moved):
+            expected, expected_reward, _ = bitboard.move(board, direction)
+            assert int(new_board) == expected and int(reward) == expected_reward
+            assert bool(board_moved) == (expected != board)
+
+    legal = batch_engine.legal_moves(np.array(boards, dtype=np.uint64))
+    for board, row in zip(boards, legal):
+        assert sum(1 << direction for direction in range(4) if row[direction]) == bitboard.legal_moves(board)
+    assert list(batch_engine.game_over(np.array(boards, dtype=np.uint64))) == [bitboard.is_game_over(board)
+                                                                               for board in boards]
+
+
+def test_seeded_batch_games_match_scalar_games():
+    """the same seed plays the same game in bitboard.seeded_random_game and a seeded BatchGames"""
+    boards = random_boards(20, 1)
+    seeds = [bitboard.splitmix64(seed) for seed in range(len(boards))]
+    for max_moves in (None, 15):
+        games = batch_engine.BatchGames(np.array(boards, dtype=np.uint64), seeds=np.array(seeds, dtype=np.uint64))
+        scores = games.play_random(legal_only=True, max_moves=max_moves)
+        for board, seed, score, final_board in zip(boards, seeds, scores, games.boards):
+            points, expected_board = bitboard.seeded_random_game(board, seed, max_moves)
+            assert int(score) == points and int(final_board) == expected_board
@@ -0,0 +1,87 @@
+import random
+import pytest
+import bitboard
+
+
+def random_rows(rng: random.Random) -> list:
+    return [[rng.choice([0, 0, 0, 2, 2, 4, 4, 8, 16, 1024, 32768]) for _ in range(4)] for _ in range(4)]
+
+
+def row_board(row: list) -> int:
+    """packed board with row as its top row and nothing else"""
+    return bitboard.pack([row, [0] * 4, [0] * 4, [0] * 4])
+
+
+def test_pack_unpack_round_trip():
+    rng = random.Random(0)
+    for _ in range(500):
+        rows = random_rows(rng)
+        assert bitboard.unpack(bitboard.pack(rows)) == rows
+
+
+def test_pack_refuses_tiles_too_big_for_a_nibble():
+    with pytest.raises(ValueError):
+        bitboard.pack([[65536, 0, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+
+
+@pytest.mark.parametrize("row, direction, expected, reward", [
+    ([2, 2, 0, 0], 1, [4, 0, 0, 0], 4),
+    ([2, 2, 2, 2], 1, [4, 4, 0, 0], 8),
+    ([2, 2, 4, 0], 1, [8, 0, 0, 0], 12),  # a freshly merged tile absorbs an equal next one, the way Game always has
+    ([0, 4, 2, 2], 0, [0, 0, 0, 8], 12),
+    ([4, 2, 2, 0], 1, [4, 4, 0, 0], 4),
+    ([2, 4, 8, 16], 1, [2, 4, 8, 16], 0),
+    ([32768, 32768, 0, 0], 1, [32768, 32768, 0, 0], 0),  # can't merge into a tile a nibble can't hold
+])
+def test_collapse_rule(row, direction, expected, reward):
+    new_board, points, _ = bitboard.move(row_board(row), direction)
+    assert bitboard.unpack(new_board)[0] == expected
+    assert points == reward
+
+
+def test_transpose_swaps_rows_and_columns():
+    rng = random.Random(1)
+    for _ in range(500):
+        board = rng.getrandbits(64)
+        assert bitboard.transpose(bitboard.transpose(board)) == board
+        assert bitboard.unpack(bitboard.transpose(board)) == [list(column) for column in zip(*bitboard.unpack(board))]
+
+
+def test_legal_moves_matches_moving():
+    rng = random.Random(2)
+    for _ in range(500):
+        board = bitboard.pack(random_rows(rng))
+        mask = sum(1 << direction for direction in range(4) if bitboard.move(board, direction)[0] != board)
+        assert bitboard.legal_moves(board) == mask
+        assert bitboard.is_game_over(board) == (mask == 0)
+
+
+def test_board_stats():
+    rng = random.Random(3)
+    for _ in range(500):
+        rows = random_rows(rng)
+        board = bitboard.pack(rows)
+        empty = [4 * y + x for y in range(4) for x in range(4) if not rows[y][x]]
+        pairs = sum(rows[y][x] == rows[y][x + 1] != 0 and rows[y][x] < 32768 for y in range(4) for x in range(3))
+        pairs += sum(rows[y][x] == rows[y + 1][x] != 0 and rows[y][x] < 32768 for y in range(3) for x in range(4))
+        assert bitboard.empty_cells(board) == empty
+        assert bitboard.count_empty(board) == len(empty)
+        assert bitboard.empty_mask(board) == sum(1 << cell for cell in empty)
+        assert [bitboard.select_cell(bitboard.empty_mask(board), k) for k in range(len(empty))] == empty
+        assert bitboard.count_merges(board) == pairs
+        assert bitboard.has_merge(board) == (pairs > 0)
+        assert bitboard.max_tile(board) == max(max(row) for row in rows)
+
+
+def test_spawn_fills_one_empty_cell():
+    rng = random.Random(4)
+    board = row_board([2, 4, 0, 0])
+    fours = 0
+    for _ in range(2000):
+        new_board = bitboard.spawn(board, rng)
+        spawned = new_board ^ board
+        assert new_board & board == board and spawned
+        cell = (spawned.bit_length() - 1) // 4
+        assert cell >= 2 and spawned >> (4 * cell) in (1, 2)
+        fours += spawned >> (4 * cell) == 2
+    assert 120 < fours < 280  # 10% of them
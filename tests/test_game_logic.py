@@ -0,0 +1,114 @@
+import random
+import pytest
+import bitboard
+from game_logic import Board, Game, BitBoard, BitboardGame
+
+
+def new_game(cls, rows=None):
+    if cls is Game:
+        board = Board(initial_board=None if rows is None else [row[:] for row in rows])
+    else:
+        board = BitBoard(initial_board=rows)
+    return cls(board=board, use_gui=False, no_display=True)
+
+
+def random_rows(rng: random.Random) -> list:
+    return [[rng.choice([0, 0, 0, 2, 2, 4, 4, 8, 16]) for _ in range(4)] for _ in range(4)]
+
+
+def test_table_moves_match_sliding_tile_by_tile():
+    """the packed tables against Game's original tile by tile rules, on every direction of random boards"""
+    rng = random.Random(0)
+    for _ in range(1000):
+        rows = random_rows(rng)
+        for direction in range(4):
+            table_game = new_game(Game, rows)
+            slide_game = new_game(Game, rows)
+            moved = table_game.move(direction, print_board=False, illegal_warn=False, add_tile=False)
+            assert slide_game.slide_tiles(direction) == moved
+            assert table_game.board.board == slide_game.board.board
+            assert table_game.score == slide_game.score
+
+
+def test_game_and_bitboard_game_in_lockstep():
+    """the same seeded games on both backends, checking the board and every stat after each move"""
+    for seed in range(10):
+        games = []
+        for cls in (Game, BitboardGame):
+            random.seed(seed)
+            game = new_game(cls)
+            game.setup_board()
+            games.append(game)
+        game, bitboard_game = games
+
+        move_rng = random.Random(seed)
+        while not game.game_over_check():
+            assert game.legal_moves() == bitboard_game.legal_moves()
+            direction = move_rng.choice(bitboard.LEGAL_DIRECTIONS[game.legal_moves()])
+            state = random.getstate()
+            game.move(direction, print_board=False)
+            random.setstate(state)  # same spawn on both
+            bitboard_game.move(direction, print_board=False)
+
+            assert game.board.board == bitboard_game.board.board
+            for stat in ("score", "num_moves", "highest_tile", "empty_count", "can_merge"):
+                assert getattr(game, stat) == getattr(bitboard_game, stat)
+            assert game.empty_mask == bitboard.empty_mask(bitboard.pack(game.board.board))
+        assert bitboard_game.game_over_check()
+
+
+def test_game_keeps_its_rules_above_32768():
+    game = new_game(Game, [[65536, 0, 0, 0], [0] * 4, [0] * 4, [0, 0, 0, 2]])
+    assert game.move(1, print_board=False, add_tile=False)
+    assert game.board.board == [[65536, 0, 0, 0], [0] * 4, [0] * 4, [2, 0, 0, 0]]
+    assert game.highest_tile == 65536
+
+    game = new_game(Game, [[32768, 32768, 0, 0], [0] * 4, [0] * 4, [0] * 4])
+    assert game.can_merge and game.legal_moves() == 0b1011  # everything but up
+    assert game.move(1, print_board=False, add_tile=False)
+    assert game.board.board[0] == [65536, 0, 0, 0]
+    assert game.score == 65536 and game.highest_tile == 65536
+
+
+@pytest.mark.parametrize("cls", [Game, BitboardGame])
+def test_push_pop_round_trip(cls):
+    rng = random.Random(1)
+    random.seed(1)
+    game = new_game(cls)
+    game.setup_board()
+    for _ in range(30):
+        game.move(rng.choice(bitboard.LEGAL_DIRECTIONS[game.legal_moves()]), print_board=False)
+
+    def state():
+        return ([row[:] for row in game.board.board], game.score, game.num_moves, game.highest_tile, game.empty_count,
+                game.can_merge)
+
+    before = state()
+    pushed = 0
+    for _ in range(20):
+        legal = bitboard.LEGAL_DIRECTIONS[game.legal_moves()]
+        if not legal:
+            break
+        assert game.push_move(rng.choice(legal))
+        pushed += 1
+        y, x = rng.choice(game.board.get_empty_tiles())
+        game.push_spawn(rng.choice((2, 4)), x, y)
+        pushed += 1
+    for direction in range(4):
+        if not game.legal_moves() & (1 << direction):
+            assert not game.push_move(direction)  # and nothing was pushed
+    for _ in range(pushed):
+        game.pop()
+    assert state() == before
+    assert not game.undo_stack
+
+
+@pytest.mark.parametrize("cls", [Game, BitboardGame])
+def test_clone_is_independent(cls):
+    random.seed(2)
+    game = new_game(cls)
+    game.setup_board()
+    copy = game.clone()
+    copy.move(next(iter(bitboard.LEGAL_DIRECTIONS[copy.legal_moves()])), print_board=False)
+    assert copy.board.board != game.board.board
+    assert game.num_moves == 0